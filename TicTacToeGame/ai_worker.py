@@ -0,0 +1,90 @@
+import queue
+import threading
+from collections import namedtuple
+
+import game_logic as gl
+from search_stats import SearchStats
+
+# `move` is ai_move's answer, or the analyze() list for submit_analysis requests.
+SearchResult = namedtuple("SearchResult", "request_id move error stats")
+
+
+class AIWorker:
+    """Runs ai_move on a background thread so the Tk event loop never blocks.
+
+    The GUI submits a search, then polls for the result from a Tk `after` callback.
+    Submitting a new search or calling cancel() stops the previous one; results
+    from anything but the latest request are dropped by poll().
+    """
+
+    def __init__(self, collect_stats=False):
+        self.collect_stats = collect_stats
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._next_id = 0
+        self._latest_id = None
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ai-search", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        return self._latest_id is not None
+
+    def submit(self, board, difficulty, ai_symbol, **kwargs):
+        return self._submit(self._search, board, difficulty, ai_symbol, kwargs)
+
+    def submit_analysis(self, board, side, **kwargs):
+        """Run game_logic.analyze for `side` in the background; poll() returns its list."""
+        return self._submit(self._analyze, board, side, None, kwargs)
+
+    def _submit(self, task, board, first, second, kwargs):
+        self.cancel()
+        self._next_id += 1
+        self._latest_id = self._next_id
+        self._cancel_event = threading.Event()
+        snapshot = board.copy() if isinstance(board, gl.UltimateBoard) else [row[:] for row in board]
+        self._requests.put((self._latest_id, self._cancel_event, task, snapshot, first, second, kwargs))
+        return self._latest_id
+
+    def cancel(self):
+        self._cancel_event.set()
+        self._latest_id = None
+
+    def poll(self):
+        """Return the SearchResult of the latest request once it is ready, else None."""
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                return None
+            if result.request_id == self._latest_id:
+                self._latest_id = None
+                return result
+
+    def shutdown(self):
+        self.cancel()
+        self._requests.put(None)
+
+    def _run(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            request_id, cancel_event, task, board, first, second, kwargs = request
+            if cancel_event.is_set():
+                continue
+            stats = SearchStats() if self.collect_stats else None
+            try:
+                move = task(board, first, second, cancel_event, stats, kwargs)
+                self._results.put(SearchResult(request_id, move, None, stats))
+            except Exception as e:
+                self._results.put(SearchResult(request_id, None, e, stats))
+
+    @staticmethod
+    def _search(board, difficulty, ai_symbol, cancel_event, stats, kwargs):
+        return gl.ai_move(board, difficulty, ai_symbol, cancel_event=cancel_event, stats=stats, **kwargs)
+
+    @staticmethod
+    def _analyze(board, side, _, cancel_event, stats, kwargs):
+        return gl.analyze(board, side, cancel_event=cancel_event, **kwargs)
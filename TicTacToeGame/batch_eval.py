@@ -0,0 +1,131 @@
+"""Vectorised position evaluation for bulk analysis (requires NumPy).
+
+Boards are rows of an (n, N*N) int8 array, cell (r, c) at column r * N + c, holding
+CELL_EMPTY, CELL_X or CELL_O. Results match game_logic (get_winning_line,
+check_winner, is_board_full and get_available_moves) row for row; run this
+module with --self-check to verify that on random boards.
+"""
+import argparse
+import math
+import random
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+import game_logic as gl
+import nk_engine
+
+CELL_EMPTY = 0
+CELL_X = 1
+CELL_O = 2
+_SYMBOL_CODES = {gl.EMPTY: CELL_EMPTY, gl.PLAYER_X: CELL_X, gl.AI_O: CELL_O}
+_CODE_SYMBOLS = {CELL_X: gl.PLAYER_X, CELL_O: gl.AI_O}
+
+DEFAULT_CHUNK_ROWS = 1 << 16
+
+BatchResult = namedtuple("BatchResult", "winner line_index full legal_moves")
+
+
+@lru_cache(maxsize=None)
+def line_index_array(size):
+    """(lines, K) array of cell columns, in get_winning_line's scan order."""
+    tables = nk_engine.line_tables(size, gl.win_length_for(size))
+    lines = np.array(tables.lines, dtype=np.intp)
+    lines.setflags(write=False)
+    return lines
+
+
+def boards_to_array(boards):
+    """Convert list-of-lists boards (all the same size) into an (n, N*N) int8 array."""
+    return np.array(
+        [[_SYMBOL_CODES[cell] for row in board for cell in row] for board in boards],
+        dtype=np.int8,
+    ).reshape(len(boards), -1)
+
+
+def _board_size(cells):
+    size = math.isqrt(cells)
+    if size * size != cells:
+        raise ValueError(f"row length {cells} is not a square board")
+    return size
+
+
+def evaluate_batch(boards, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Evaluate every row of `boards` at once.
+
+    Returns a BatchResult of arrays: winner (CELL_X/CELL_O, or CELL_EMPTY if none),
+    line_index (index into line_index_array(N) of the first completed line, or -1),
+    full (no empty cells) and legal_moves (empty cells, all False once someone
+    has won). Rows are processed `chunk_rows` at a time to bound temporary memory.
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    if boards.ndim != 2:
+        raise ValueError("boards must be a 2-D (n, N*N) array")
+    lines = line_index_array(_board_size(boards.shape[1]))
+    n = boards.shape[0]
+
+    winner = np.zeros(n, dtype=np.int8)
+    line_index = np.full(n, -1, dtype=np.int16)
+    for start in range(0, n, chunk_rows):
+        chunk = boards[start:start + chunk_rows]
+        cells = chunk[:, lines]
+        first = cells[:, :, :1]
+        completed = (first != CELL_EMPTY)[:, :, 0] & (cells == first).all(axis=2)
+        has_line = completed.any(axis=1)
+        first_line = completed.argmax(axis=1)
+        rows = np.nonzero(has_line)[0]
+        line_index[start + rows] = first_line[rows]
+        winner[start + rows] = chunk[rows, lines[first_line[rows], 0]]
+
+    empty = boards == CELL_EMPTY
+    full = ~empty.any(axis=1)
+    legal_moves = empty & (line_index < 0)[:, None]
+    return BatchResult(winner, line_index, full, legal_moves)
+
+
+def _random_board(size, rng):
+    return [[rng.choice((gl.EMPTY, gl.PLAYER_X, gl.AI_O)) for _ in range(size)] for _ in range(size)]
+
+
+def self_check(samples, sizes, seed=0):
+    """Compare evaluate_batch with game_logic on random boards; returns mismatch count."""
+    rng = random.Random(seed)
+    mismatches = 0
+    for size in sizes:
+        boards = [_random_board(size, rng) for _ in range(samples)]
+        result = evaluate_batch(boards_to_array(boards))
+        lines = line_index_array(size)
+        for i, board in enumerate(boards):
+            expected = gl.get_winning_line(board)
+            index = int(result.line_index[i])
+            got = None if index < 0 else [divmod(int(cell), size) for cell in lines[index]]
+            full = gl.is_board_full(board)
+
+            winner = _CODE_SYMBOLS.get(int(result.winner[i]))
+            won = gl.check_winner(board, gl.PLAYER_X) or gl.check_winner(board, gl.AI_O)
+            winner_ok = (winner is not None) == won and (winner is None or gl.check_winner(board, winner))
+            moves = [divmod(int(cell), size) for cell in np.flatnonzero(result.legal_moves[i])]
+            expected_moves = [] if won else sorted(gl.get_available_moves(board))
+
+            if got != expected or bool(result.full[i]) != full or not winner_ok or moves != expected_moves:
+                mismatches += 1
+                print(f"mismatch on {size}x{size} board {board}: line {got} != {expected}, "
+                      f"winner {winner}, legal moves {moves} != {expected_moves}")
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch evaluator self-check")
+    parser.add_argument("--self-check", type=int, default=20000, metavar="SAMPLES",
+                        help="random boards per size to compare with game_logic")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(gl.BOARD_SIZES))
+    args = parser.parse_args(argv)
+    mismatches = self_check(args.self_check, args.sizes)
+    print(f"{mismatches} mismatches over {args.self_check} boards per size {args.sizes}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
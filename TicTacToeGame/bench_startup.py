@@ -0,0 +1,96 @@
+"""Startup-time benchmark: importing the engine headless, and bringing the GUI window up.
+
+Each sample runs in a fresh interpreter so module caches don't hide import cost.
+
+    python bench_startup.py [--runs 10] [--max-import-ms 150] [--max-gui-ms 1500]
+
+Exits non-zero if a median exceeds its limit, or if importing the engine pulls in
+tkinter or pygame.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ("tkinter", "_tkinter", "pygame")
+
+_IMPORT_SNIPPET = f"""
+import json, sys, time
+t0 = time.perf_counter()
+import game_logic, ai_worker, sound_bank
+elapsed = time.perf_counter() - t0
+print(json.dumps({{"ms": elapsed * 1000, "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+_GUI_SNIPPET = """
+import json, time
+t0 = time.perf_counter()
+from gui import TicTacToeGUI
+app = TicTacToeGUI(autostart=False)
+app.window.update()
+elapsed = time.perf_counter() - t0
+app.quit_game()
+print(json.dumps({"ms": elapsed * 1000}))
+"""
+
+
+def _sample(snippet):
+    proc = subprocess.run([sys.executable, "-c", snippet], cwd=HERE,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None, proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"
+    return json.loads(proc.stdout.strip().splitlines()[-1]), None
+
+
+def measure(snippet, runs):
+    samples = []
+    for _ in range(runs):
+        result, error = _sample(snippet)
+        if error:
+            return None, error
+        samples.append(result)
+    return samples, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-import-ms", type=float, default=150.0)
+    parser.add_argument("--max-gui-ms", type=float, default=1500.0)
+    args = parser.parse_args(argv)
+
+    failed = False
+
+    samples, error = measure(_IMPORT_SNIPPET, args.runs)
+    if error:
+        print(f"engine import: FAILED ({error})")
+        return 1
+    import_ms = statistics.median(s["ms"] for s in samples)
+    heavy = sorted({m for s in samples for m in s["heavy"]})
+    print(f"engine import: median {import_ms:.1f} ms over {args.runs} runs")
+    if heavy:
+        print(f"  REGRESSION: importing the engine loaded {heavy}")
+        failed = True
+    if import_ms > args.max_import_ms:
+        print(f"  REGRESSION: above {args.max_import_ms:.0f} ms limit")
+        failed = True
+
+    samples, error = measure(_GUI_SNIPPET, args.runs)
+    if error:
+        # No display (CI, servers): report it rather than failing the engine check.
+        print(f"GUI window up: skipped ({error})")
+    else:
+        gui_ms = statistics.median(s["ms"] for s in samples)
+        print(f"GUI window up: median {gui_ms:.1f} ms over {args.runs} runs")
+        if gui_ms > args.max_gui_ms:
+            print(f"  REGRESSION: above {args.max_gui_ms:.0f} ms limit")
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
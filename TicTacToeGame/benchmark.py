@@ -0,0 +1,250 @@
+"""Micro-benchmarks for the game_logic hot paths.
+
+    python benchmark.py                      # run and print
+    python benchmark.py --save baseline.json # record a baseline on this machine
+    python benchmark.py --compare baseline.json --threshold 0.25
+    python benchmark.py --memory 10000       # bytes per game: GameState vs list-of-lists
+    python benchmark.py --alloc-check 50     # bytes allocated per 3x3 search node
+
+With --compare the run fails (exit code 1) if any benchmark is more than
+`threshold` slower than its baseline. Timings are the best of several repeats,
+reported in microseconds per call.
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+
+import game_logic as gl
+import mcts_engine
+import nk_engine
+import transposition
+import ultimate_engine
+from game_state import GameState
+from search_stats import SearchStats
+
+# Positions reached by normal play, so search benchmarks don't depend on RNG.
+MID_GAME = [
+    ['X', ' ', ' '],
+    [' ', 'O', ' '],
+    [' ', ' ', 'X'],
+]
+LATE_GAME = [
+    ['X', 'O', 'X'],
+    [' ', 'O', ' '],
+    [' ', 'X', ' '],
+]
+WON = [
+    ['X', 'X', 'X'],
+    ['O', 'O', ' '],
+    [' ', ' ', ' '],
+]
+
+
+def _fresh_minimax(board):
+    # Clear the shared transposition table so every call measures a real search.
+    def run():
+        gl.clear_transposition_table()
+        gl.minimax(board, 0, True, -math.inf, math.inf, gl.AI_O, gl.PLAYER_X)
+    return run
+
+
+def _ai_move(board, difficulty):
+    return lambda: gl.ai_move(board, difficulty, gl.AI_O)
+
+
+def _nk_fixed_depth(size, depth):
+    tables = nk_engine.line_tables(size, gl.win_length_for(size))
+    centre = (size // 2) * size + size // 2
+
+    def run():
+        nk_engine.best_move(1 << centre, 0, size, tables.win_length, 60_000, max_depth=depth)
+    return run
+
+
+BENCHMARKS = {
+    "check_winner": lambda: gl.check_winner(LATE_GAME, gl.PLAYER_X),
+    "check_winner_won": lambda: gl.check_winner(WON, gl.PLAYER_X),
+    "get_winning_line": lambda: gl.get_winning_line(LATE_GAME),
+    "get_winning_line_won": lambda: gl.get_winning_line(WON),
+    "get_available_moves": lambda: gl.get_available_moves(MID_GAME),
+    "is_board_full": lambda: gl.is_board_full(LATE_GAME),
+    "minimax_empty": _fresh_minimax(gl.init_board()),
+    "minimax_mid_game": _fresh_minimax(MID_GAME),
+    "minimax_late_game": _fresh_minimax(LATE_GAME),
+    "ai_move_easy": _ai_move(MID_GAME, gl.EASY),
+    "ai_move_medium": _ai_move(MID_GAME, gl.MEDIUM),
+    "ai_move_hard": _ai_move(MID_GAME, gl.HARD),
+    "nk_4x4_depth4": _nk_fixed_depth(4, 4),
+    "nk_7x7_depth3": _nk_fixed_depth(7, 3),
+    "mcts_9x9_500_playouts": lambda: mcts_engine.best_move(0, 1 << 40, 9, 5, playouts=500, seed=0),
+    "ultimate_depth4": lambda: ultimate_engine.best_move(ultimate_engine.UltimateBoard(), 0, 60_000,
+                                                         max_depth=4),
+}
+
+
+def time_call(func, repeats=5, min_time=0.2):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeats, number=number))
+    return best / number * 1e6
+
+
+def run(names=None, repeats=5):
+    random.seed(0)
+    results = {}
+    for name, func in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        results[name] = time_call(func, repeats)
+    return results
+
+
+def _list_game(board):
+    # What the GUI keeps per game: the board plus loose score/turn attributes.
+    return {"board": [row[:] for row in board], "current_player": gl.PLAYER_X,
+            "player_score": 0, "ai_score": 0, "draw_count": 0, "moves": 5}
+
+
+def _state_game(board):
+    return gl.to_game_state(board)
+
+
+def memory_per_game(games, board=MID_GAME):
+    """Bytes allocated per stored game for each representation, measured with tracemalloc."""
+    results = {}
+    for name, make in (("list_of_lists", _list_game), ("game_state", _state_game)):
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        kept = [make(board) for _ in range(games)]
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        stats = after.compare_to(before, "filename")
+        results[name] = sum(stat.size_diff for stat in stats) / len(kept)
+    return results
+
+
+def search_allocations(searches, board=MID_GAME):
+    """(nodes searched, net bytes, peak transient bytes) over repeated 3x3 searches.
+
+    The search makes and unmakes moves on one FlatBoard and stores into a
+    preallocated transposition table, so once it has run every node should
+    leave memory exactly as it found it. The board and table are reset before
+    each search so every run searches the full tree. Net bytes only catch
+    growth, so each search's traced peak is taken too: any object made and freed
+    mid-search, even an int or an iterator, lifts the peak above the level the
+    search started and ended at.
+    """
+    ai_bits, player_bits = gl.board_to_bitboards(board, gl.AI_O, gl.PLAYER_X)
+    empties = len(gl.get_available_moves(board))
+    flat = gl.FlatBoard(ai_bits, player_bits)
+    stats = SearchStats()
+    gl.clear_transposition_table()
+    gl._negamax_flat(flat, 1, empties, -gl._SCORE_BOUND, gl._SCORE_BOUND, stats)
+    nodes = stats.nodes * searches
+
+    only_search = [tracemalloc.Filter(True, gl.__file__), tracemalloc.Filter(True, transposition.__file__)]
+    tracemalloc.start()
+    # One traced search first, so ints it leaves in the board's history counters
+    # are traced objects that later searches replace, not new growth.
+    flat.load(ai_bits, player_bits)
+    gl.clear_transposition_table()
+    gl._negamax_flat(flat, 1, empties, -gl._SCORE_BOUND, gl._SCORE_BOUND)
+    before = tracemalloc.take_snapshot().filter_traces(only_search)
+    transient = 0
+    for _ in range(searches):
+        flat.load(ai_bits, player_bits)
+        gl.clear_transposition_table()
+        # Nothing may allocate between resetting the peak and reading it back;
+        # get_traced_memory reads both values before building its result.
+        tracemalloc.reset_peak()
+        gl._negamax_flat(flat, 1, empties, -gl._SCORE_BOUND, gl._SCORE_BOUND)
+        current, peak = tracemalloc.get_traced_memory()
+        transient = max(transient, peak - current)
+    after = tracemalloc.take_snapshot().filter_traces(only_search)
+    tracemalloc.stop()
+    net = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return nodes, net, transient
+
+
+def compare(results, baseline, threshold):
+    """Return the names of benchmarks slower than baseline by more than `threshold`."""
+    regressions = []
+    for name, us in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = us / base
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<24} {us:12.2f} us  baseline {base:12.2f} us  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="game_logic benchmark suite")
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="JSON baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown before failing, as a fraction (default 0.25)")
+    parser.add_argument("--memory", type=int, metavar="GAMES",
+                        help="measure bytes per stored game instead of timing")
+    parser.add_argument("--alloc-check", type=int, metavar="SEARCHES",
+                        help="check the 3x3 search allocates nothing per node, then exit")
+    args = parser.parse_args(argv)
+
+    if args.memory:
+        memory = memory_per_game(args.memory)
+        for name, size in memory.items():
+            print(f"{name:<24} {size:10.1f} bytes/game")
+        print(f"GameState is {memory['list_of_lists'] / memory['game_state']:.1f}x smaller;"
+              f" {GameState.PACKED_SIZE} bytes serialised")
+        return 0
+
+    if args.alloc_check:
+        nodes, net, transient = search_allocations(args.alloc_check)
+        print(f"{nodes} nodes searched, {net} bytes net allocated ({net / nodes:g} bytes/node),"
+              f" {transient} bytes transient peak")
+        if net or transient:
+            print("FAIL: the search should not allocate per node")
+            return 1
+        return 0
+
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {sorted(unknown)}")
+
+    results = run(args.names, args.repeats)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+    else:
+        regressions = []
+        for name, us in results.items():
+            print(f"{name:<24} {us:12.2f} us")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "results": results}, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed past {args.threshold:.0%}: {regressions}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
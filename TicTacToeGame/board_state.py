@@ -0,0 +1,96 @@
+class IncrementalBoard:
+    """Board that keeps per-line stone counts up to date as moves are played and undone.
+
+    Sides are 0 and 1. A win test only looks at the lines through the cell just
+    played, and "board full" is a comparison against the move counter. Built from a
+    nk_engine.line_tables() result; if `count_weights` is given (value of an
+    uncontested line by stone count), a heuristic score for side 0 is kept as well.
+    """
+
+    def __init__(self, tables, count_weights=None):
+        self.tables = tables
+        self.cells = [None] * tables.cell_count
+        self.bits = [0, 0]
+        self.counts = ([0] * len(tables.lines), [0] * len(tables.lines))
+        self.move_count = 0
+        self.score = 0
+        self.winning_line_index = None
+        self._count_weights = count_weights
+        self._moves = []
+        self._win_at = None
+
+    @property
+    def moves(self):
+        """Cells played so far, in order."""
+        return tuple(self._moves)
+
+    def is_full(self):
+        return self.move_count == self.tables.cell_count
+
+    @property
+    def winner(self):
+        if self.winning_line_index is None:
+            return None
+        return self.cells[self.tables.lines[self.winning_line_index][0]]
+
+    def winning_line(self):
+        """Cells of the first completed line as (row, col) pairs, or None."""
+        if self.winning_line_index is None:
+            return None
+        size = self.tables.size
+        return [divmod(cell, size) for cell in self.tables.lines[self.winning_line_index]]
+
+    def play(self, cell, side):
+        """Place a stone for `side`; returns True if it completes a line."""
+        self.cells[cell] = side
+        self.bits[side] |= 1 << cell
+        mine = self.counts[side]
+        theirs = self.counts[1 - side]
+        weights = self._count_weights
+        win_length = self.tables.win_length
+        won = None
+
+        for line in self.tables.cell_lines[cell]:
+            count = mine[line]
+            if weights is not None and not theirs[line]:
+                delta = weights[count + 1] - weights[count]
+                self.score += delta if side == 0 else -delta
+            elif weights is not None and count == 0:
+                # Our first stone kills the opponent's open line.
+                lost = weights[theirs[line]]
+                self.score += lost if side == 0 else -lost
+            count += 1
+            mine[line] = count
+            if count == win_length and (won is None or line < won):
+                won = line
+
+        self._moves.append(cell)
+        self.move_count += 1
+        if won is not None and self.winning_line_index is None:
+            self.winning_line_index = won
+            self._win_at = self.move_count
+        return won is not None
+
+    def undo(self):
+        cell = self._moves.pop()
+        side = self.cells[cell]
+        if self._win_at == self.move_count:
+            self.winning_line_index = None
+            self._win_at = None
+        self.move_count -= 1
+        self.cells[cell] = None
+        self.bits[side] ^= 1 << cell
+        mine = self.counts[side]
+        theirs = self.counts[1 - side]
+        weights = self._count_weights
+
+        for line in self.tables.cell_lines[cell]:
+            count = mine[line] - 1
+            mine[line] = count
+            if weights is not None and not theirs[line]:
+                delta = weights[count + 1] - weights[count]
+                self.score -= delta if side == 0 else -delta
+            elif weights is not None and count == 0:
+                lost = weights[theirs[line]]
+                self.score -= lost if side == 0 else -lost
+        return cell
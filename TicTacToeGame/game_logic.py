@@ -1,45 +1,301 @@
 import math
+import multiprocessing
+import os
 import random
+import time
+from collections import namedtuple
+
+import mcts_engine
+import nk_engine
+import ultimate_engine
+from board_state import IncrementalBoard
+from game_state import GameState
+from symmetry import SYMMETRY_TABLES_3X3, canonical_form, canonical_key_3x3, inverse_permutations
+from transposition import TranspositionTable, EXACT, LOWER_BOUND, bound_flag
+from ultimate_engine import UltimateBoard
 
 PLAYER_X = 'X'
 AI_O = 'O'
 EMPTY = ' '
 
+# Side indices used by bitboard-based helpers such as IncrementalBoard.
+SYMBOL_SIDES = {PLAYER_X: 0, AI_O: 1}
+
 EASY = "Easy"
 MEDIUM = "Medium"
 HARD = "Hard"
+MONTE_CARLO = "Monte Carlo"
+DIFFICULTIES = (EASY, MEDIUM, HARD, MONTE_CARLO)
+
+# Ultimate tic-tac-toe is played as a mode of its own on a 9x9 grid of sub-boards.
+ULTIMATE = "Ultimate"
+
+# Larger boards are won with K in a row; 3x3 keeps the classic rules.
+BOARD_SIZES = (3, 4, 5, 7, 9)
+WIN_LENGTHS = {3: 3, 4: 4, 5: 4, 7: 5, 9: 5}
+DEFAULT_TIME_BUDGET_MS = 1000
+# Processes for root-parallel MCTS; None means one per CPU.
+MCTS_WORKERS = None
+
+# Bitboard layout: cell (r, c) is bit r * size + c, so a 3x3 side fits in a 9-bit int.
+BOARD_SIZE = 3
+CELL_COUNT = BOARD_SIZE * BOARD_SIZE
+FULL_MASK = (1 << CELL_COUNT) - 1
+
+# Same order that get_winning_line has always scanned: rows, columns, diagonals.
+WIN_LINES = tuple(
+    [[(r, c) for c in range(3)] for r in range(3)] +
+    [[(r, c) for r in range(3)] for c in range(3)] +
+    [[(i, i) for i in range(3)], [(i, 2 - i) for i in range(3)]]
+)
+WIN_MASKS = tuple(sum(1 << (r * 3 + c) for r, c in line) for line in WIN_LINES)
+
+INDEX_TO_MOVE = tuple((i // 3, i % 3) for i in range(CELL_COUNT))
+
+# Lookup tables indexed by a 9-bit mask, so the search never loops over lines or cells.
+_WIN_TABLE = tuple(any(bits & m == m for m in WIN_MASKS) for bits in range(FULL_MASK + 1))
+_MASK_TO_INDICES = tuple(
+    tuple(i for i in range(CELL_COUNT) if bits >> i & 1) for bits in range(FULL_MASK + 1)
+)
+
+# Search order: centre, corners, edges.
+_MOVE_PRIORITY = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+_ORDERED_INDICES = tuple(
+    tuple(i for i in _MOVE_PRIORITY if bits >> i & 1) for bits in range(FULL_MASK + 1)
+)
+
+# The 3x3 search runs on a FlatBoard: cells hold 0 (empty) or side 1 / 2, and
+# each move is pushed on a preallocated stack and undone in place. Ints above 256
+# are new objects in CPython, so every value a node needs beyond that (bitboards,
+# table indices) is looked up in a table here rather than computed, and searching
+# a node allocates nothing. _TOGGLE_CELL[cell][bits] is bits with `cell` flipped.
+_TOGGLE_CELL = tuple(
+    tuple(bits ^ (1 << cell) for bits in range(FULL_MASK + 1)) for cell in range(CELL_COUNT)
+)
+_NO_KILLER = CELL_COUNT
+# Scores are +1/0/-1, so +-2 stands in for an infinite window.
+_SCORE_BOUND = 2
+# History counters are halved once one passes this, so a counter plus the largest
+# bonus (empties squared) never exceeds 256.
+_HISTORY_LIMIT = 256 - CELL_COUNT * CELL_COUNT
+
+# Transposition slots are indexed by the base-3 digits of the symmetry-canonical
+# (mover, opponent) pair, so symmetric positions share a slot and a store never
+# allocates. Shared across ai_move calls, so later replies reuse earlier searches.
+_TERNARY = tuple(sum(3 ** i for i in _MASK_TO_INDICES[bits]) for bits in range(FULL_MASK + 1))
+_TRANSPOSITION_TABLE = TranspositionTable(3 ** CELL_COUNT, -1, 1)
+
+
+def _canonical_index_table():
+    # _CANONICAL_INDEX[me][opp] is the slot for that position. Rows only run to
+    # opp = FULL_MASK ^ me, the largest opponent mask that fits beside `me`.
+    rows = [[None] * (FULL_MASK - me + 1) for me in range(FULL_MASK + 1)]
+    for me in range(FULL_MASK + 1):
+        row = rows[me]
+        free = FULL_MASK ^ me
+        opp = free
+        while True:
+            if row[opp] is None:
+                # Fill the whole symmetry class at once.
+                key = canonical_key_3x3(me, opp)
+                index = _TERNARY[key >> CELL_COUNT] + 2 * _TERNARY[key & FULL_MASK]
+                for t in SYMMETRY_TABLES_3X3:
+                    rows[t[me]][t[opp]] = index
+            if not opp:
+                break
+            opp = (opp - 1) & free
+    return tuple(tuple(row) for row in rows)
+
+_CANONICAL_INDEX = _canonical_index_table()
+
+
+def clear_transposition_table():
+    _TRANSPOSITION_TABLE.clear()
+
+
+class FlatBoard:
+    """3x3 search position: flat cell array, move stack and ordering state, all preallocated.
+
+    `bits` holds each side's bitboard (index 1 and 2) for win checks and
+    transposition keys. Moves are tried killer first, then in `history_order`:
+    by history score, ties centre, corners, edges. Each ply copies that order
+    into its own slot of `orders`, so reordering deeper in the tree can't
+    disturb its loop. Per-node methods use while loops, since a for loop
+    allocates an iterator.
+    """
+    __slots__ = ("cells", "bits", "moves", "ply", "killers", "history", "history_order", "orders")
+
+    def __init__(self, first_bits=0, second_bits=0):
+        self.cells = [0] * CELL_COUNT
+        self.bits = [0, 0, 0]
+        self.moves = [0] * CELL_COUNT
+        self.ply = 0
+        self.killers = [_NO_KILLER] * (CELL_COUNT + 1)
+        self.history = [0] * CELL_COUNT
+        self.history_order = list(_MOVE_PRIORITY)
+        self.orders = [list(_MOVE_PRIORITY) for _ in range(CELL_COUNT + 1)]
+        self.load(first_bits, second_bits)
 
-def init_board():
-    
-    return [[EMPTY for _ in range(3)] for _ in range(3)]
+    def load(self, first_bits, second_bits):
+        """Set up a position from bitboards for side 1 and side 2, ready for a new search."""
+        cells = self.cells
+        history = self.history
+        for i in range(CELL_COUNT):
+            cells[i] = 1 if first_bits >> i & 1 else 2 if second_bits >> i & 1 else 0
+            history[i] = 0
+        self.bits[1] = first_bits
+        self.bits[2] = second_bits
+        self.ply = 0
+        killers = self.killers
+        for i in range(CELL_COUNT + 1):
+            killers[i] = _NO_KILLER
+        self.history_order[:] = _MOVE_PRIORITY
+
+    def make(self, cell, side):
+        """Place `side` on an empty `cell`; True if that completes a line."""
+        self.cells[cell] = side
+        bits = _TOGGLE_CELL[cell][self.bits[side]]
+        self.bits[side] = bits
+        self.moves[self.ply] = cell
+        self.ply += 1
+        return _WIN_TABLE[bits]
+
+    def unmake(self):
+        self.ply -= 1
+        cell = self.moves[self.ply]
+        side = self.cells[cell]
+        self.bits[side] = _TOGGLE_CELL[cell][self.bits[side]]
+        self.cells[cell] = 0
+
+    def add_history(self, cell, bonus):
+        """Credit a cutoff to `cell` and move it up `history_order` in place."""
+        history = self.history
+        score = history[cell] + bonus
+        if score > _HISTORY_LIMIT:
+            # Halving keeps the counters in order (ties aside) and below the limit.
+            i = 0
+            while i < CELL_COUNT:
+                history[i] >>= 1
+                i += 1
+            score >>= 1
+        history[cell] = score
+        order = self.history_order
+        i = order.index(cell)
+        while i and history[order[i - 1]] < score:
+            order[i] = order[i - 1]
+            i -= 1
+        order[i] = cell
+
+    def ordered_moves(self, ply):
+        """This ply's move order (occupied cells included): killer, then history order."""
+        order = self.orders[ply]
+        history_order = self.history_order
+        killer = self.killers[ply]
+        j = 0
+        if killer != _NO_KILLER:
+            order[0] = killer
+            j = 1
+        i = 0
+        while i < CELL_COUNT:
+            cell = history_order[i]
+            i += 1
+            if cell != killer:
+                order[j] = cell
+                j += 1
+        return order
+
+def win_length_for(size):
+    return WIN_LENGTHS.get(size, min(size, 5))
+
+def _line_tables(size):
+    return nk_engine.line_tables(size, win_length_for(size))
+
+def incremental_board(size=BOARD_SIZE):
+    """Empty IncrementalBoard for a game of this size; play sides via SYMBOL_SIDES."""
+    return IncrementalBoard(_line_tables(size))
+
+def ultimate_board():
+    """Empty UltimateBoard; play sides via SYMBOL_SIDES and pass it to ai_move as the board."""
+    return UltimateBoard()
+
+def move_to_index(move, size=BOARD_SIZE):
+    return move[0] * size + move[1]
+
+def board_to_bits(board, symbol):
+    """Pack the cells holding `symbol` into an int, bit r * size + c per cell."""
+    if isinstance(board, GameState):
+        return board.side_bits(SYMBOL_SIDES[symbol]) if symbol in SYMBOL_SIDES else 0
+    size = len(board)
+    bits = 0
+    for r in range(size):
+        row = board[r]
+        for c in range(size):
+            if row[c] == symbol:
+                bits |= 1 << (r * size + c)
+    return bits
+
+def board_to_bitboards(board, first_symbol, second_symbol):
+    return board_to_bits(board, first_symbol), board_to_bits(board, second_symbol)
+
+def _free_mask(board):
+    size = len(board)
+    if isinstance(board, GameState):
+        return ((1 << size * size) - 1) ^ board.occupied
+    occupied = 0
+    for r in range(size):
+        row = board[r]
+        for c in range(size):
+            if row[c] != EMPTY:
+                occupied |= 1 << (r * size + c)
+    return ((1 << size * size) - 1) ^ occupied
+
+def _has_win(bits, size):
+    if size == BOARD_SIZE:
+        return _WIN_TABLE[bits]
+    return nk_engine.has_win(bits, _line_tables(size))
+
+def to_game_state(board, **counters):
+    """GameState for a list-of-lists board; X is taken to have moved first."""
+    x_bits, o_bits = board_to_bitboards(board, PLAYER_X, AI_O)
+    move_count = bin(x_bits).count("1") + bin(o_bits).count("1")
+    return GameState(len(board), x_bits, o_bits, move_count % 2, move_count, **counters)
+
+def to_board(state):
+    """List-of-lists board for a GameState."""
+    size = state.size
+    board = init_board(size)
+    for bits, symbol in ((state.x_bits, PLAYER_X), (state.o_bits, AI_O)):
+        for i in nk_engine.bit_indices(bits):
+            board[i // size][i % size] = symbol
+    return board
+
+def init_board(size=BOARD_SIZE):
+
+    return [[EMPTY for _ in range(size)] for _ in range(size)]
 
 def get_available_moves(board):
-    return [(i, j) for i in range(3) for j in range(3) if board[i][j] == EMPTY]
+    size = len(board)
+    if size == BOARD_SIZE:
+        return [INDEX_TO_MOVE[i] for i in _MASK_TO_INDICES[_free_mask(board)]]
+    return [divmod(i, size) for i in nk_engine.bit_indices(_free_mask(board))]
 
 def is_board_full(board):
-    return all(board[i][j] != EMPTY for i in range(3) for j in range(3))
+    return _free_mask(board) == 0
 
 def check_winner(board, player):
     """Check if specified player has won."""
-    for i in range(3):
-        if all(board[i][j] == player for j in range(3)): return True
-        if all(board[j][i] == player for j in range(3)): return True
-    if all(board[i][i] == player for i in range(3)): return True
-    if all(board[i][2 - i] == player for i in range(3)): return True
-    return False
+    return _has_win(board_to_bits(board, player), len(board))
 
 def get_winning_line(board):
-    
-    for r in range(3):
-        if all(board[r][c] == board[r][0] and board[r][0] != EMPTY for c in range(3)):
-            return [(r, c) for c in range(3)]
-    for c in range(3):
-        if all(board[r][c] == board[0][c] and board[0][c] != EMPTY for r in range(3)):
-            return [(r, c) for r in range(3)]
-    if all(board[i][i] == board[0][0] and board[0][0] != EMPTY for i in range(3)):
-        return [(i, i) for i in range(3)]
-    if all(board[i][2 - i] == board[0][2] and board[0][2] != EMPTY for i in range(3)):
-        return [(i, 2 - i) for i in range(3)]
+
+    size = len(board)
+    x_bits, o_bits = board_to_bitboards(board, PLAYER_X, AI_O)
+    if not (_has_win(x_bits, size) or _has_win(o_bits, size)):
+        return None
+    tables = _line_tables(size)
+    for line, mask in zip(tables.lines, tables.masks):
+        if x_bits & mask == mask or o_bits & mask == mask:
+            return [divmod(i, size) for i in line]
     return None
 
 def evaluate_board(board, ai_symbol, player_symbol):
@@ -47,89 +303,342 @@ def evaluate_board(board, ai_symbol, player_symbol):
     elif check_winner(board, player_symbol): return -1
     else: return 0
 
-def minimax(board, depth, is_maximizing, alpha, beta, ai_symbol, player_symbol):
-    score = evaluate_board(board, ai_symbol, player_symbol)
+def minimax(board, depth, is_maximizing, alpha, beta, ai_symbol, player_symbol, stats=None):
+    """Exact 3x3 search; larger boards go through nk_engine instead."""
+    ai_bits, player_bits = board_to_bitboards(board, ai_symbol, player_symbol)
+    return _minimax_bits(ai_bits, player_bits, is_maximizing, alpha, beta, stats)
 
-    if score == 1 or score == -1: return score
-    if is_board_full(board): return 0
+def _minimax_bits(ai_bits, player_bits, is_maximizing, alpha, beta, stats=None):
+    """Score from the AI's point of view, via the side-to-move negamax core."""
+    if _WIN_TABLE[ai_bits]: return 1
+    if _WIN_TABLE[player_bits]: return -1
+    empties = CELL_COUNT - bin(ai_bits | player_bits).count("1")
+    if not empties: return 0
+    board = FlatBoard(ai_bits, player_bits)
+    alpha, beta = _score_window(alpha, beta)
+    if is_maximizing:
+        return _negamax_flat(board, 1, empties, alpha, beta, stats)
+    return -_negamax_flat(board, 2, empties, -beta, -alpha, stats)
 
-    available_moves = get_available_moves(board)
+def _score_window(alpha, beta):
+    # Scores are integers in [-1, 1]: round the window outwards and clamp it.
+    alpha = -_SCORE_BOUND if alpha < -1 else min(math.floor(alpha), 1)
+    beta = _SCORE_BOUND if beta > 1 else max(math.ceil(beta), -1)
+    return alpha, beta
 
-    if is_maximizing:
-        best_score = -math.inf
-        for move in available_moves:
-            board[move[0]][move[1]] = ai_symbol
-            current_score = minimax(board, depth + 1, False, alpha, beta, ai_symbol, player_symbol)
-            board[move[0]][move[1]] = EMPTY
-            best_score = max(best_score, current_score)
-            alpha = max(alpha, best_score)
-            if beta <= alpha:
-                break
-        return best_score
-    else:
-        best_score = math.inf
-        for move in available_moves:
-            board[move[0]][move[1]] = player_symbol
-            current_score = minimax(board, depth + 1, True, alpha, beta, ai_symbol, player_symbol)
-            board[move[0]][move[1]] = EMPTY
-            best_score = min(best_score, current_score)
-            beta = min(beta, best_score)
-            if beta <= alpha:
-                break
-        return best_score
+def _negamax_flat(board, side, empties, alpha, beta, stats=None):
+    """Principal-variation negamax on a FlatBoard with `side` (1 or 2) to move.
+
+    The position must be neither won nor full. Scores are +1/0/-1 for `side`.
+    """
+    if stats is not None:
+        stats.nodes += 1
+        if board.ply > stats.max_ply: stats.max_ply = board.ply
+    other = 3 - side
+    table = _TRANSPOSITION_TABLE
+    index = _CANONICAL_INDEX[board.bits[side]][board.bits[other]]
+    entry = table.probe(index)
+    if entry:
+        if stats is not None: stats.tt_hits += 1
+        score = table.scores[entry]
+        flag = table.flags[entry]
+        if flag == EXACT:
+            return score
+        if flag == LOWER_BOUND:
+            if score > alpha: alpha = score
+        elif score < beta:
+            beta = score
+        if alpha >= beta:
+            return score
+
+    alpha_orig, beta_orig = alpha, beta
+    cells = board.cells
+    ply = board.ply
+    best_score = -_SCORE_BOUND
+    first = True
+    order = board.ordered_moves(ply)
+    i = 0
+    while i < CELL_COUNT:
+        cell = order[i]
+        i += 1
+        if cells[cell]:
+            continue
+        if board.make(cell, side):
+            score = 1
+        elif empties == 1:
+            score = 0
+        elif first:
+            score = -_negamax_flat(board, other, empties - 1, -beta, -alpha, stats)
+        else:
+            # Scores are integers, so a window of width one proves "no better than alpha".
+            score = -_negamax_flat(board, other, empties - 1, -alpha - 1, -alpha, stats)
+            if alpha < score < beta:
+                score = -_negamax_flat(board, other, empties - 1, -beta, -alpha, stats)
+        board.unmake()
+        first = False
+        if score > best_score:
+            best_score = score
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    if stats is not None: stats.cutoffs += 1
+                    board.killers[ply] = cell
+                    board.add_history(cell, empties * empties)
+                    break
 
-def ai_move(board, difficulty=HARD, ai_symbol=AI_O):
-    available_moves = get_available_moves(board)
-    if not available_moves: return None
+    table.store(index, best_score, bound_flag(best_score, alpha_orig, beta_orig))
+    return best_score
+
+def ai_move(board, difficulty=HARD, ai_symbol=AI_O, board_size=None, time_budget_ms=None,
+            cancel_event=None, stats=None):
+    """Pick the AI's move as (row, col), or None if the board is full.
+
+    For Ultimate, pass the game's UltimateBoard (with the AI to move) as `board`.
+
+    Pass a search_stats.SearchStats as `stats` to have it filled in with node counts,
+    cutoffs, depth, transposition hits, elapsed time and how the move was chosen.
+    """
+    if stats is None:
+        return _ai_move(board, difficulty, ai_symbol, board_size, time_budget_ms, cancel_event, None)
+    started = time.perf_counter()
+    move = _ai_move(board, difficulty, ai_symbol, board_size, time_budget_ms, cancel_event, stats)
+    stats.elapsed_ms = (time.perf_counter() - started) * 1000
+    return move
+
+def _ai_move(board, difficulty, ai_symbol, board_size, time_budget_ms, cancel_event, stats):
+    if isinstance(board, UltimateBoard):
+        if board_size is not None and board_size != board.size:
+            raise ValueError(f"board_size {board_size} does not match an Ultimate board")
+        return _ai_move_ultimate(board, difficulty, ai_symbol,
+                                 DEFAULT_TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms,
+                                 cancel_event, stats)
+    size = len(board)
+    if board_size is not None and board_size != size:
+        raise ValueError(f"board_size {board_size} does not match a {size}x{size} board")
+    if difficulty == MONTE_CARLO:
+        return _ai_move_mcts(board, ai_symbol, size,
+                             DEFAULT_TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms,
+                             cancel_event, stats)
+    if size != BOARD_SIZE:
+        return _ai_move_nk(board, difficulty, ai_symbol, size,
+                           DEFAULT_TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms,
+                           cancel_event, stats)
 
     player_symbol = PLAYER_X if ai_symbol == AI_O else AI_O
+    ai_bits, player_bits = board_to_bitboards(board, ai_symbol, player_symbol)
+    free = _free_mask(board)
+
+    available = _MASK_TO_INDICES[free]
+    if not available: return None
+    if stats is not None: stats.source = "rule"
 
     if difficulty == EASY:
-        return random.choice(available_moves)
+        if stats is not None: stats.source = "random"
+        return INDEX_TO_MOVE[random.choice(available)]
 
     elif difficulty == MEDIUM:
-        for move in available_moves:
-            board[move[0]][move[1]] = ai_symbol
-            if check_winner(board, ai_symbol):
-                board[move[0]][move[1]] = EMPTY
-                return move
-            board[move[0]][move[1]] = EMPTY
-
-        for move in available_moves:
-            board[move[0]][move[1]] = player_symbol
-            if check_winner(board, player_symbol):
-                board[move[0]][move[1]] = EMPTY
-                return move
-            board[move[0]][move[1]] = EMPTY
-
-        return (_find_best_move_minimax(board, ai_symbol, player_symbol)
-                if random.random() < 0.5 else random.choice(available_moves))
+        for i in available:
+            if _WIN_TABLE[ai_bits | (1 << i)]:
+                return INDEX_TO_MOVE[i]
+
+        for i in available:
+            if _WIN_TABLE[player_bits | (1 << i)]:
+                return INDEX_TO_MOVE[i]
+
+        if random.random() < 0.5:
+            return _find_best_move_bits(ai_bits, player_bits, free, stats)
+        if stats is not None: stats.source = "random"
+        return INDEX_TO_MOVE[random.choice(available)]
 
     elif difficulty == HARD:
-        if len(available_moves) == 9:
+        if len(available) == 9:
             return random.choice([(0,0), (0,2), (2,0), (2,2), (1,1)])
-        if len(available_moves) == 8 and board[1][1] == EMPTY:
+        if len(available) == 8 and free >> 4 & 1:
             return (1,1)
-        return _find_best_move_minimax(board, ai_symbol, player_symbol)
+        return _find_best_move_bits(ai_bits, player_bits, free, stats)
 
     else:
         print(f"Warning: Unknown difficulty '{difficulty}'. Defaulting to Hard.")
-        return _find_best_move_minimax(board, ai_symbol, player_symbol)
+        return _find_best_move_bits(ai_bits, player_bits, free, stats)
+
+def _ai_move_nk(board, difficulty, ai_symbol, size, time_budget_ms, cancel_event=None, stats=None):
+    """ai_move for boards larger than 3x3, using the time-bounded K-in-a-row engine."""
+    player_symbol = PLAYER_X if ai_symbol == AI_O else AI_O
+    ai_bits, player_bits = board_to_bitboards(board, ai_symbol, player_symbol)
+    available = nk_engine.bit_indices(_free_mask(board))
+    if not available: return None
+
+    tables = _line_tables(size)
+    if stats is not None: stats.source = "rule"
+    if difficulty == EASY:
+        if stats is not None: stats.source = "random"
+        return divmod(random.choice(available), size)
+
+    elif difficulty == MEDIUM:
+        for i in available:
+            if nk_engine.wins_through(ai_bits | (1 << i), i, tables):
+                return divmod(i, size)
+        for i in available:
+            if nk_engine.wins_through(player_bits | (1 << i), i, tables):
+                return divmod(i, size)
+        if random.random() >= 0.5:
+            if stats is not None: stats.source = "random"
+            return divmod(random.choice(available), size)
+        time_budget_ms = min(time_budget_ms, DEFAULT_TIME_BUDGET_MS // 4)
+
+    elif difficulty != HARD:
+        print(f"Warning: Unknown difficulty '{difficulty}'. Defaulting to Hard.")
 
-def _find_best_move_minimax(board, ai_symbol, player_symbol):
+    if difficulty != MEDIUM:
+        # Early positions come from the opening book, which is built with a longer search.
+        import opening_book
+        cell = opening_book.lookup(ai_bits, player_bits, size)
+        if cell is not None:
+            if stats is not None: stats.source = "book"
+            return divmod(cell, size)
+
+    if stats is not None: stats.source = "search"
+    cell = nk_engine.best_move(ai_bits, player_bits, size, win_length_for(size), time_budget_ms,
+                               stats=stats, cancel_event=cancel_event)
+    return divmod(cell, size)
+
+def _ai_move_ultimate(board, difficulty, ai_symbol, time_budget_ms, cancel_event=None, stats=None):
+    """ai_move for Ultimate, using the time-bounded ultimate_engine search.
+
+    Monte Carlo has no Ultimate engine of its own and plays like Hard here.
+    """
+    available = board.legal_moves()
+    if not available: return None
+    side = SYMBOL_SIDES[ai_symbol]
+    if stats is not None: stats.source = "rule"
+    if difficulty == EASY:
+        if stats is not None: stats.source = "random"
+        return divmod(random.choice(available), board.size)
+
+    elif difficulty == MEDIUM:
+        if random.random() >= 0.5:
+            if stats is not None: stats.source = "random"
+            return divmod(random.choice(available), board.size)
+        time_budget_ms = min(time_budget_ms, DEFAULT_TIME_BUDGET_MS // 4)
+
+    elif difficulty not in (HARD, MONTE_CARLO):
+        print(f"Warning: Unknown difficulty '{difficulty}'. Defaulting to Hard.")
+
+    if stats is not None: stats.source = "search"
+    cell = ultimate_engine.best_move(board, side, time_budget_ms, stats=stats,
+                                     cancel_event=cancel_event)
+    return divmod(cell, board.size)
+
+def _ai_move_mcts(board, ai_symbol, size, time_budget_ms, cancel_event=None, stats=None):
+    """ai_move for MONTE_CARLO on any board size, via root-parallel UCT."""
+    player_symbol = PLAYER_X if ai_symbol == AI_O else AI_O
+    ai_bits, player_bits = board_to_bitboards(board, ai_symbol, player_symbol)
+    # Worker processes (tournament games, server searches) don't start pools of their own.
+    workers = 1 if multiprocessing.parent_process() is not None else MCTS_WORKERS or os.cpu_count() or 1
+    cell = mcts_engine.best_move(ai_bits, player_bits, size, win_length_for(size), time_budget_ms,
+                                 workers=workers, stats=stats, cancel_event=cancel_event)
+    return None if cell is None else divmod(cell, size)
+
+# value: +1 win, 0 draw (or unproven on larger boards), -1 loss for the side to move.
+# distance: plies until the game ends under best play, or None when unproven.
+# score: the raw search score behind `value` (equal to it on 3x3).
+MoveAnalysis = namedtuple("MoveAnalysis", "move value distance score")
+ANALYSIS_CACHE_SIZE = 4096
+# Canonical position -> analysis, kept in least-recently-used order.
+_analysis_cache = {}
+
+def analyze(board, side, time_budget_ms=None, cancel_event=None):
+    """Rate every move for `side` (the symbol to move), best first, as MoveAnalysis tuples.
+
+    3x3 values are exact, from the solved table. Larger boards score the
+    candidate moves (cells next to a stone) with nk_engine within the time
+    budget, or until `cancel_event` is set; only forced wins and losses get a
+    distance there. Results are cached per symmetry-canonical position, except
+    ones cut short by `cancel_event`. Either side may have moved first, but
+    ValueError is raised if `side` has more stones than its opponent.
+    """
+    size = len(board)
+    other = PLAYER_X if side == AI_O else AI_O
+    mover, opponent = board_to_bitboards(board, side, other)
+    if bin(mover).count("1") > bin(opponent).count("1"):
+        raise ValueError(f"it is {other}'s turn, not {side}'s")
+    if size != BOARD_SIZE and time_budget_ms is None:
+        time_budget_ms = DEFAULT_TIME_BUDGET_MS
+    a, b, k = canonical_form(mover, opponent, size)
+    inverse = inverse_permutations(size)[k]
+    key = (a, b, size, time_budget_ms)
+    # Least recently used first: a hit moves its entry to the end.
+    results = _analysis_cache.pop(key, None)
+    complete = True
+    if results is None:
+        results = _analyze_canonical(a, b, size, time_budget_ms, cancel_event)
+        complete = cancel_event is None or not cancel_event.is_set()
+    if complete:
+        _analysis_cache[key] = results
+        if len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+            del _analysis_cache[next(iter(_analysis_cache))]
+    return [MoveAnalysis(divmod(inverse[cell], size), value, distance, score)
+            for cell, value, distance, score in results]
+
+def clear_analysis_cache():
+    _analysis_cache.clear()
+
+def _analyze_canonical(mover, opponent, size, time_budget_ms, cancel_event=None):
+    tables = _line_tables(size)
+    if _has_win(mover, size) or _has_win(opponent, size):
+        return ()
+    results = []
+    if size == BOARD_SIZE:
+        import solved_table
+        for i in _MASK_TO_INDICES[FULL_MASK ^ (mover | opponent)]:
+            entry = solved_table.lookup(opponent, mover | (1 << i))
+            if entry is None:
+                raise ValueError("position cannot arise in a game")
+            score, distance, _ = entry
+            results.append((i, -score, distance + 1, -score))
+    else:
+        scores, _ = nk_engine.score_moves(mover, opponent, size, tables.win_length, time_budget_ms,
+                                          cancel_event)
+        for cell, score in scores.items():
+            proven = nk_engine.plies_to_result(score, tables.cell_count)
+            value, distance = proven if proven is not None else (0, None)
+            results.append((cell, value, distance, score))
+    # Best first: higher value, then faster wins / slower losses, then higher raw score.
+    results.sort(key=lambda r: (r[1], -(r[2] or 0) if r[1] > 0 else (r[2] or 0), r[3]), reverse=True)
+    return tuple(results)
+
+def _find_best_move_minimax(board, ai_symbol, player_symbol, stats=None):
     """Helper function to find best move using minimax."""
-    best_score = -math.inf
-    best_move = None
-    available_moves = get_available_moves(board)
-    random.shuffle(available_moves)
+    ai_bits, player_bits = board_to_bitboards(board, ai_symbol, player_symbol)
+    return _find_best_move_bits(ai_bits, player_bits, _free_mask(board), stats)
 
-    for move in available_moves:
-        board[move[0]][move[1]] = ai_symbol
-        score = minimax(board, 0, False, -math.inf, math.inf, ai_symbol, player_symbol)
-        board[move[0]][move[1]] = EMPTY
+def _find_best_move_bits(ai_bits, player_bits, free, stats=None):
+    # Every reachable 3x3 position is pre-solved; fall back to searching if this one isn't.
+    import solved_table
+    entry = solved_table.lookup(ai_bits, player_bits)
+    if entry is not None and entry[2]:
+        if stats is not None: stats.source = "table"
+        return INDEX_TO_MOVE[random.choice(_MASK_TO_INDICES[entry[2]])]
+
+    if stats is not None: stats.source = "search"
+    # Root moves get exact scores so the AI can still vary its play among equal moves.
+    best_score = -math.inf
+    best_moves = []
+    board = FlatBoard(ai_bits, player_bits)
+    empties = len(_MASK_TO_INDICES[free])
+    for i in _ORDERED_INDICES[free]:
+        if board.make(i, 1):
+            score = 1
+        elif empties == 1:
+            score = 0
+        else:
+            score = -_negamax_flat(board, 2, empties - 1, -_SCORE_BOUND, _SCORE_BOUND, stats)
+        board.unmake()
 
         if score > best_score:
             best_score = score
-            best_move = move
+            best_moves = [i]
+        elif score == best_score:
+            best_moves.append(i)
 
-    return best_move if best_move is not None else available_moves[0]
+    return INDEX_TO_MOVE[random.choice(best_moves)]
@@ -0,0 +1,254 @@
+"""Compact binary game log.
+
+A log file is a small header followed by fixed-size records, one per finished
+game, so files can be appended to by several tools and read without an index:
+
+    uint32  end time (Unix seconds)
+    uint8   board size
+    uint8   X player, uint8 O player   (PLAYER_HUMAN, or 1 + index in DIFFICULTIES)
+    uint8   result                     (RESULT_DRAW, RESULT_X_WINS or RESULT_O_WINS)
+    uint8   first mover                (0 if X moved first, 1 if O did)
+    uint8   move count
+    81 x uint8 moves                   (cell r * size + c, in play order, zero padded)
+
+Readers memory-map the file and unpack records lazily, so iterating millions of
+games never holds more than one record in memory.
+
+    python game_record.py summary games.bin
+    python game_record.py replay games.bin 42
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from collections import Counter, namedtuple
+
+import game_logic as gl
+
+MAGIC = b"TTTR"
+FORMAT_VERSION = 2
+MAX_MOVES = 81
+_HEADER = struct.Struct("<4sHH")
+_RECORD = struct.Struct(f"<IBBBBBB{MAX_MOVES}s")
+RECORD_SIZE = _RECORD.size
+
+PLAYER_HUMAN = 0
+RESULT_DRAW = 0
+RESULT_X_WINS = 1
+RESULT_O_WINS = 2
+_RESULT_NAMES = {RESULT_DRAW: "draw", RESULT_X_WINS: "X wins", RESULT_O_WINS: "O wins"}
+_FIRST_MOVERS = (gl.PLAYER_X, gl.AI_O)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "records", "games.bin")
+
+GameRecord = namedtuple("GameRecord", "timestamp size x_player o_player result moves first_mover")
+
+
+def player_code(difficulty):
+    """PLAYER_HUMAN for None, else the record code of a difficulty level."""
+    if difficulty is None:
+        return PLAYER_HUMAN
+    return gl.DIFFICULTIES.index(difficulty) + 1
+
+
+def player_name(code):
+    if code == PLAYER_HUMAN:
+        return "Human"
+    if 1 <= code <= len(gl.DIFFICULTIES):
+        return gl.DIFFICULTIES[code - 1]
+    return f"Unknown({code})"
+
+
+def result_code(winner_symbol):
+    """RESULT_* code for the winning symbol, or RESULT_DRAW for None."""
+    if winner_symbol is None:
+        return RESULT_DRAW
+    return RESULT_X_WINS if winner_symbol == gl.PLAYER_X else RESULT_O_WINS
+
+
+def pack_record(size, x_player, o_player, result, moves, timestamp=None, first_mover=gl.PLAYER_X):
+    if len(moves) > MAX_MOVES:
+        raise ValueError(f"a record holds at most {MAX_MOVES} moves, got {len(moves)}")
+    if timestamp is None:
+        timestamp = int(time.time())
+    return _RECORD.pack(timestamp, size, x_player, o_player, result,
+                        _FIRST_MOVERS.index(first_mover), len(moves), bytes(moves))
+
+
+def _unpack(fields):
+    timestamp, size, x_player, o_player, result, first, count, moves = fields
+    return GameRecord(timestamp, size, x_player, o_player, result, tuple(moves[:count]),
+                      _FIRST_MOVERS[first & 1])
+
+
+def _check_header(data, path):
+    if len(data) < _HEADER.size or _HEADER.unpack_from(data, 0) != (MAGIC, FORMAT_VERSION, RECORD_SIZE):
+        raise ValueError(f"unrecognised game log '{path}' (expected format version {FORMAT_VERSION})")
+
+
+class GameRecordWriter:
+    """Appends records to a log file, writing the header if the file is new.
+
+    Raises ValueError if an existing file is not a log in this format version.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, flush_each=True):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "ab")
+        self._flush_each = flush_each
+        if self._file.tell() == 0:
+            self._file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, RECORD_SIZE))
+            self._file.flush()
+        else:
+            with open(path, "rb") as f:
+                header = f.read(_HEADER.size)
+            try:
+                _check_header(header, path)
+            except ValueError:
+                self._file.close()
+                raise
+
+    def append(self, size, x_player, o_player, result, moves, timestamp=None,
+               first_mover=gl.PLAYER_X):
+        self._file.write(pack_record(size, x_player, o_player, result, moves, timestamp,
+                                     first_mover))
+        if self._flush_each:
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameRecordReader:
+    """Memory-mapped view of a log file; indexable and iterable."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"'{path}' is not a game log")
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            _check_header(self._data, path)
+        except ValueError:
+            self._data.close()
+            raise
+        # A torn final record (from a crash mid-append) is ignored.
+        self._count = (size - _HEADER.size) // RECORD_SIZE
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("record index out of range")
+        return _unpack(_RECORD.unpack_from(self._data, _HEADER.size + index * RECORD_SIZE))
+
+    def __iter__(self):
+        view = memoryview(self._data)[_HEADER.size:_HEADER.size + self._count * RECORD_SIZE]
+        records = _RECORD.iter_unpack(view)
+        try:
+            for fields in records:
+                yield _unpack(fields)
+        finally:
+            # Drop every buffer export so the mmap can be closed.
+            del records
+            view.release()
+
+    def close(self):
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def replay(record):
+    """Yield the board (list of lists) after each move of a record."""
+    board = gl.init_board(record.size)
+    symbols = _ply_symbols(record)
+    for ply, cell in enumerate(record.moves):
+        row, col = divmod(cell, record.size)
+        board[row][col] = symbols[ply % 2]
+        yield board
+
+
+def _ply_symbols(record):
+    """(symbol on even plies, symbol on odd plies) for a record."""
+    if record.first_mover == gl.AI_O:
+        return gl.AI_O, gl.PLAYER_X
+    return gl.PLAYER_X, gl.AI_O
+
+
+def _print_board(board):
+    print("\n".join(" " + " | ".join(row) for row in board))
+
+
+def _summary(path):
+    results = Counter()
+    lengths = Counter()
+    with GameRecordReader(path) as reader:
+        for record in reader:
+            matchup = (record.size, player_name(record.x_player), player_name(record.o_player))
+            results[matchup + (record.result,)] += 1
+            lengths[matchup] += len(record.moves)
+        total = len(reader)
+    print(f"{total} games in {path}")
+    for matchup in sorted(lengths):
+        size, x_name, o_name = matchup
+        games = sum(results[matchup + (r,)] for r in _RESULT_NAMES)
+        outcomes = ", ".join(f"{_RESULT_NAMES[r]} {results[matchup + (r,)]}" for r in _RESULT_NAMES)
+        print(f"  {size}x{size} {x_name} (X) vs {o_name} (O): {games} games, {outcomes},"
+              f" {lengths[matchup] / games:.1f} moves/game")
+
+
+def _replay(path, index):
+    with GameRecordReader(path) as reader:
+        record = reader[index]
+    print(f"Game {index}: {record.size}x{record.size}, {player_name(record.x_player)} (X) vs "
+          f"{player_name(record.o_player)} (O), {time.strftime('%Y-%m-%d %H:%M', time.localtime(record.timestamp))}")
+    symbols = _ply_symbols(record)
+    for ply, board in enumerate(replay(record), 1):
+        row, col = divmod(record.moves[ply - 1], record.size)
+        print(f"\n{ply}. {symbols[(ply - 1) % 2]} at ({row}, {col})")
+        _print_board(board)
+    print(f"\nResult: {_RESULT_NAMES.get(record.result, record.result)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect binary game logs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summary = commands.add_parser("summary", help="results and game lengths per matchup")
+    summary.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    replay_cmd = commands.add_parser("replay", help="print one game move by move")
+    replay_cmd.add_argument("path")
+    replay_cmd.add_argument("index", type=int, help="record number (negative counts from the end)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "summary":
+            _summary(args.path)
+        else:
+            _replay(args.path, args.index)
+    except (OSError, ValueError, IndexError) as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
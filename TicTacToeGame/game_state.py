@@ -0,0 +1,93 @@
+import struct
+
+# size, side to move, move count, side 0 bits, side 1 bits, three score counters.
+_PACKED = struct.Struct("<BBB16s16sIII")
+MAX_SIZE = 11
+
+
+class GameState:
+    """One game in a few machine words: two bitboards plus counters.
+
+    Sides are 0 (X) and 1 (O), as in game_logic.SYMBOL_SIDES, and cell (r, c) is
+    bit r * size + c. The game_logic board functions accept a GameState wherever
+    they take a list-of-lists board; game_logic.to_game_state / to_board convert.
+    """
+
+    __slots__ = ("size", "x_bits", "o_bits", "to_move", "move_count",
+                 "player_score", "ai_score", "draw_count")
+
+    PACKED_SIZE = _PACKED.size
+
+    def __init__(self, size=3, x_bits=0, o_bits=0, to_move=0, move_count=0,
+                 player_score=0, ai_score=0, draw_count=0):
+        if not 1 <= size <= MAX_SIZE:
+            raise ValueError(f"board size must be 1..{MAX_SIZE}, got {size}")
+        self.size = size
+        self.x_bits = x_bits
+        self.o_bits = o_bits
+        self.to_move = to_move
+        self.move_count = move_count
+        self.player_score = player_score
+        self.ai_score = ai_score
+        self.draw_count = draw_count
+
+    def __len__(self):
+        return self.size
+
+    def __eq__(self, other):
+        if not isinstance(other, GameState):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in GameState.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in GameState.__slots__)
+        return f"GameState({fields})"
+
+    @property
+    def occupied(self):
+        return self.x_bits | self.o_bits
+
+    def side_bits(self, side):
+        return self.o_bits if side else self.x_bits
+
+    def cell_side(self, row, col):
+        """0 or 1 for the side holding (row, col), or None if it is empty."""
+        bit = 1 << (row * self.size + col)
+        if self.x_bits & bit:
+            return 0
+        if self.o_bits & bit:
+            return 1
+        return None
+
+    def play(self, row, col):
+        """Place a stone for the side to move and pass the turn."""
+        bit = 1 << (row * self.size + col)
+        if (self.x_bits | self.o_bits) & bit:
+            raise ValueError(f"cell {(row, col)} is taken")
+        if self.to_move:
+            self.o_bits |= bit
+        else:
+            self.x_bits |= bit
+        self.to_move ^= 1
+        self.move_count += 1
+
+    def clear_board(self):
+        """Empty the board for a new game, keeping the scores."""
+        self.x_bits = 0
+        self.o_bits = 0
+        self.to_move = 0
+        self.move_count = 0
+
+    def copy(self):
+        return GameState(*(getattr(self, name) for name in GameState.__slots__))
+
+    def tobytes(self):
+        return _PACKED.pack(self.size, self.to_move, self.move_count,
+                            self.x_bits.to_bytes(16, "little"), self.o_bits.to_bytes(16, "little"),
+                            self.player_score, self.ai_score, self.draw_count)
+
+    @classmethod
+    def frombytes(cls, data):
+        size, to_move, move_count, x_bits, o_bits, player, ai, draws = _PACKED.unpack(data)
+        return cls(size, int.from_bytes(x_bits, "little"), int.from_bytes(o_bits, "little"),
+                   to_move, move_count, player, ai, draws)
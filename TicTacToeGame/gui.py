@@ -1,22 +1,28 @@
 import tkinter as tk
 from tkinter import ttk
-import os
-
-try:
-    import pygame
-    PYGAME_AVAILABLE = True
-except ImportError:
-    PYGAME_AVAILABLE = False
 
 import game_logic as gl
+import game_record
+from ai_worker import AIWorker
+from ponder import Ponderer
+from search_stats import LatencyHistogram
+from sound_bank import SoundBank
+from style_registry import StyleRegistry
 from themes import THEMES, DEFAULT_THEME
 
 AI_THINK_DELAY_MS = 400
-DIFFICULTY_LEVELS = [gl.EASY, gl.MEDIUM, gl.HARD]
+AI_TIME_BUDGET_MS = 1000
+AI_POLL_INTERVAL_MS = 20
+DIFFICULTY_LEVELS = list(gl.DIFFICULTIES)
+BOARD_SIZE_LABELS = {f"{n}x{n}": n for n in gl.BOARD_SIZES}
+BOARD_MENU_LABELS = list(BOARD_SIZE_LABELS) + [gl.ULTIMATE]
+# Extra space between Ultimate's sub-boards, in pixels.
+SUB_BOARD_GAP = 8
+CELL_FONT_SIZES = {3: 36, 4: 28, 5: 22, 7: 16, 9: 13}
 MIN_WINDOW_SIZE = (500, 650)
 
 class TicTacToeGUI:
-    def __init__(self):
+    def __init__(self, autostart=True):
         self.window = tk.Tk()
         self.window.title("Tic-Tac-Toe")
         self.window.geometry("500x650")
@@ -25,15 +31,30 @@ class TicTacToeGUI:
 
         self.player_symbol = None
         self.ai_symbol = None
-        self.board = gl.init_board()
-        self.buttons = [[None for _ in range(3)] for _ in range(3)]
+        self.board_size = gl.BOARD_SIZE
+        self.ultimate = False
+        self.board = gl.init_board(self.board_size)
+        self.board_tracker = self._new_tracker()
+        self.buttons = []
+        self._cell_styles = []
+        self._dirty_cells = set()
+        self.configure_calls = 0
         self.player_score = 0
         self.ai_score = 0
         self.draw_count = 0
         self.game_active = False
         self.current_difficulty = gl.HARD
-
-        self.sound_enabled = self._init_sound()
+        self.ai_worker = AIWorker(collect_stats=True)
+        self.hint_worker = AIWorker()
+        self._hint_cells = set()
+        self._hint_after_id = None
+        self.ponderer = Ponderer()
+        self.ai_latency = LatencyHistogram()
+        self._ai_after_id = None
+        self.record_writer = None
+
+        self.sound_bank = SoundBank()
+        self.sound_enabled = self.sound_bank.load()
 
         self.themes = THEMES
         self.current_theme_name = DEFAULT_THEME
@@ -41,35 +62,15 @@ class TicTacToeGUI:
 
         self._setup_ui()
         self.apply_theme_to_all()
+        if autostart:
+            self.run()
+
+    def run(self):
         self.show_symbol_choice()
         self.window.mainloop()
 
-    def _init_sound(self):
-        if not PYGAME_AVAILABLE: return False
-        try:
-            pygame.mixer.init()
-            sounds_dir = "sounds"
-            required = ["click.wav", "win.wav", "lose.wav", "draw.wav"]
-            if not os.path.isdir(sounds_dir): return False
-            if not all(os.path.exists(os.path.join(sounds_dir, s)) for s in required):
-                print(f"Warning: Not all sound files found in '{sounds_dir}'. Missing: {[s for s in required if not os.path.exists(os.path.join(sounds_dir, s))]}")
-                return False
-            return True
-        except Exception as e:
-            print(f"Sound init error: {e}")
-            return False
-
     def _play_sound(self, sound_name):
-        if self.sound_enabled:
-            try:
-                sound_path = os.path.join("sounds", f"{sound_name}.wav")
-                if not os.path.exists(sound_path):
-                    print(f"Warning: Sound file not found: {sound_path}")
-                    return
-                sound = pygame.mixer.Sound(sound_path)
-                sound.play()
-            except Exception as e:
-                print(f"Error playing sound '{sound_name}': {e}")
+        self.sound_bank.play(sound_name)
 
     def _setup_ui(self):
         self.window.grid_columnconfigure(0, weight=1)
@@ -94,33 +95,16 @@ class TicTacToeGUI:
 
         self.board_frame = tk.Frame(self.window)
         self.board_frame.grid(row=1, column=0, sticky="nsew", padx=20, pady=10)
-
-        for r in range(3):
-            self.board_frame.rowconfigure(r, weight=1)
-            for c in range(3):
-                self.board_frame.columnconfigure(c, weight=1)
-                btn = tk.Button(
-                    self.board_frame,
-                    text=gl.EMPTY,
-                    font=("Arial", 36, "bold"),
-                    width=3,
-                    height=1,
-                    relief="flat",
-                    command=lambda row=r, col=c: self.on_button_click(row, col)
-                )
-                btn.grid(row=r, column=c, padx=5, pady=5, sticky="nsew")
-                btn.bind("<Enter>", lambda e, row=r, col=c: self.on_hover(row, col, True))
-                btn.bind("<Leave>", lambda e, row=r, col=c: self.on_hover(row, col, False))
-                self.buttons[r][c] = btn
+        self._build_board_grid()
 
         self.control_frame = tk.Frame(self.window)
         self.control_frame.grid(row=2, column=0, sticky="ew", padx=20, pady=10)
 
-        for i in range(4):
+        for i in range(6):
             self.control_frame.columnconfigure(i, weight=1, uniform="controls")
 
         self.status_frame = tk.Frame(self.control_frame)
-        self.status_frame.grid(row=0, column=0, columnspan=4, sticky="ew", pady=(0, 10))
+        self.status_frame.grid(row=0, column=0, columnspan=6, sticky="ew", pady=(0, 10))
 
         self.difficulty_label = tk.Label(
             self.status_frame,
@@ -129,6 +113,16 @@ class TicTacToeGUI:
         )
         self.difficulty_label.pack(side=tk.LEFT, expand=True)
 
+        self.ponder_var = tk.BooleanVar(value=True)
+        self.ponder_check = tk.Checkbutton(
+            self.status_frame,
+            text="Ponder",
+            variable=self.ponder_var,
+            command=self.toggle_pondering,
+            font=("Arial", 12, "bold")
+        )
+        self.ponder_check.pack(side=tk.LEFT, expand=True)
+
         self.turn_label = tk.Label(
             self.status_frame,
             text="Choose X or O to start",
@@ -174,6 +168,16 @@ class TicTacToeGUI:
         )
         self.restart_btn.grid(row=1, column=0, padx=5, sticky="ew")
 
+        self.hint_btn = tk.Button(
+            self.control_frame,
+            text="Hint",
+            font=btn_font,
+            relief=btn_relief,
+            command=self.request_hint,
+            pady=btn_pady
+        )
+        self.hint_btn.grid(row=1, column=1, padx=5, sticky="ew")
+
         self.difficulty_var = tk.StringVar(value=self.current_difficulty)
         self.difficulty_menu = ttk.OptionMenu(
             self.control_frame,
@@ -183,7 +187,7 @@ class TicTacToeGUI:
             command=self.change_difficulty
         )
         self.difficulty_menu.config(width=10)
-        self.difficulty_menu.grid(row=1, column=1, padx=5, sticky="ew")
+        self.difficulty_menu.grid(row=1, column=2, padx=5, sticky="ew")
 
         self.theme_var = tk.StringVar(value=self.current_theme_name)
         self.theme_menu = ttk.OptionMenu(
@@ -194,7 +198,19 @@ class TicTacToeGUI:
             command=self.change_theme
         )
         self.theme_menu.config(width=10)
-        self.theme_menu.grid(row=1, column=2, padx=5, sticky="ew")
+        self.theme_menu.grid(row=1, column=3, padx=5, sticky="ew")
+
+        size_label = f"{self.board_size}x{self.board_size}"
+        self.size_var = tk.StringVar(value=size_label)
+        self.size_menu = ttk.OptionMenu(
+            self.control_frame,
+            self.size_var,
+            size_label,
+            *BOARD_MENU_LABELS,
+            command=self.change_board_size
+        )
+        self.size_menu.config(width=6)
+        self.size_menu.grid(row=1, column=4, padx=5, sticky="ew")
 
         self.exit_btn = tk.Button(
             self.control_frame,
@@ -204,15 +220,59 @@ class TicTacToeGUI:
             command=self.quit_game,
             pady=btn_pady
         )
-        self.exit_btn.grid(row=1, column=3, padx=5, sticky="ew")
+        self.exit_btn.grid(row=1, column=5, padx=5, sticky="ew")
+
+        self.styles = StyleRegistry(self.window, self.themes)
+        self.styles.configure_menubuttons(font=btn_font, relief=btn_relief, padding=(8, btn_pady))
+
+    def _build_board_grid(self):
+        for row in self.buttons:
+            for btn in row:
+                btn.destroy()
+        for i in range(max(gl.BOARD_SIZES)):
+            self.board_frame.rowconfigure(i, weight=0)
+            self.board_frame.columnconfigure(i, weight=0)
+
+        size = self.board_size
+        font_size = CELL_FONT_SIZES.get(size, 16)
+        self.buttons = [[None for _ in range(size)] for _ in range(size)]
+        self._cell_styles = [[{} for _ in range(size)] for _ in range(size)]
+        self._dirty_cells.clear()
+        self._mark_all_cells_dirty()
+        for r in range(size):
+            self.board_frame.rowconfigure(r, weight=1)
+            pady = self._cell_padding(r)
+            for c in range(size):
+                self.board_frame.columnconfigure(c, weight=1)
+                btn = tk.Button(
+                    self.board_frame,
+                    text=gl.EMPTY,
+                    font=("Arial", font_size, "bold"),
+                    width=3,
+                    height=1,
+                    relief="flat",
+                    command=lambda row=r, col=c: self.on_button_click(row, col)
+                )
+                btn.grid(row=r, column=c, padx=self._cell_padding(c), pady=pady, sticky="nsew")
+                btn.bind("<Enter>", lambda e, row=r, col=c: self.on_hover(row, col, True))
+                btn.bind("<Leave>", lambda e, row=r, col=c: self.on_hover(row, col, False))
+                self.buttons[r][c] = btn
+
+    def _cell_padding(self, index):
+        # Ultimate packs 81 cells, so cells sit closer with a wider gap between sub-boards.
+        if not self.ultimate:
+            return 5
+        return (SUB_BOARD_GAP if index % 3 == 0 and index else 1, 1)
 
-        style = ttk.Style()
-        style.theme_use('clam')
-        style.configure('TMenubutton',
-                        font=btn_font,
-                        relief=btn_relief,
-                        padding=(8, btn_pady)
-                       )
+    def _new_tracker(self):
+        if self.ultimate:
+            return gl.ultimate_board()
+        return gl.incremental_board(self.board_size)
+
+    def _is_playable(self, r, c):
+        if self.board[r][c] != gl.EMPTY:
+            return False
+        return not self.ultimate or self.board_tracker.is_legal(r * self.board_size + c)
 
     def show_symbol_choice(self):
         self.choice_window = tk.Toplevel(self.window)
@@ -232,32 +292,8 @@ class TicTacToeGUI:
         y = int((screen_height/2) - (window_height/2))
         self.choice_window.geometry(f"{window_width}x{window_height}+{x}+{y}")
 
-        style = ttk.Style(self.choice_window)
-        style.theme_use('clam')
-
-        style.configure('Large.TRadiobutton',
-                       background=current_theme["bg"],
-                       foreground=current_theme["text"],
-                       font=('Arial', 17, 'bold'),
-                       selectcolor='blue',
-                       indicatorsize=14)
-
-        style.map('Large.TRadiobutton',
-                  background=[('selected', current_theme["bg"]),
-                              ('active', current_theme.get("hover", current_theme["bg"]))]
-                 )
-
-        style.configure('small.TRadiobutton',
-                       background=current_theme["bg"],
-                       foreground=current_theme["text"],
-                       font=('Arial', 15, 'bold'),
-                       selectcolor='blue',
-                       indicatorsize=14)
-
-        style.map('small.TRadiobutton',
-                  background=[('selected', current_theme["bg"]),
-                               ('active', current_theme.get("hover", current_theme["bg"]))]
-                 )
+        large_radio_style = self.styles.radio_style(self.current_theme_name, "Large")
+        small_radio_style = self.styles.radio_style(self.current_theme_name, "small")
 
         symbol_frame = tk.Frame(self.choice_window, bg=current_theme["bg"])
         symbol_frame.pack(pady=(20, 10), fill=tk.X, padx=20)
@@ -280,7 +316,7 @@ class TicTacToeGUI:
             text="X",
             variable=self.symbol_var,
             value="X",
-            style='Large.TRadiobutton'
+            style=large_radio_style
         ).pack(side=tk.LEFT, padx=20)
 
         ttk.Radiobutton(
@@ -288,7 +324,7 @@ class TicTacToeGUI:
             text="O",
             variable=self.symbol_var,
             value="O",
-            style='Large.TRadiobutton'
+            style=large_radio_style
         ).pack(side=tk.LEFT, padx=20)
 
         turn_frame = tk.Frame(self.choice_window, bg=current_theme["bg"])
@@ -312,7 +348,7 @@ class TicTacToeGUI:
             text="Play First",
             variable=self.turn_var,
             value="first",
-            style='small.TRadiobutton'
+            style=small_radio_style
         ).pack(side=tk.LEFT, padx=20)
 
         ttk.Radiobutton(
@@ -320,7 +356,7 @@ class TicTacToeGUI:
             text="Play Second",
             variable=self.turn_var,
             value="second",
-            style='small.TRadiobutton'
+            style=small_radio_style
         ).pack(side=tk.LEFT, padx=20)
 
         start_btn = tk.Button(
@@ -352,9 +388,20 @@ class TicTacToeGUI:
 
         if self.turn_var.get() == "second":
             self.update_status("AI's turn")
-            self.window.after(500, self.perform_ai_move)
+            self._schedule_ai_move(500)
         else:
             self.update_status("Your turn!")
+            self._start_pondering()
+
+    def _configure(self, widget, **options):
+        # Every configure is a Tcl round-trip; the counter lets tests check how many a move costs.
+        self.configure_calls += 1
+        widget.configure(**options)
+
+    def _mark_all_cells_dirty(self):
+        self._dirty_cells.update(
+            (r, c) for r in range(self.board_size) for c in range(self.board_size)
+        )
 
     def apply_theme_to_all(self):
         self.theme = self.themes[self.current_theme_name]
@@ -363,79 +410,109 @@ class TicTacToeGUI:
         player_color = self.theme["player"]
         ai_color = self.theme["ai"]
 
-        self.window.configure(bg=bg_color)
-        self.header_frame.configure(bg=bg_color)
-        self.board_frame.configure(bg=bg_color)
-        self.control_frame.configure(bg=bg_color)
-        self.status_frame.configure(bg=bg_color)
-        self.score_frame.configure(bg=bg_color)
-
-        self.title_label.configure(bg=bg_color, fg=text_color)
-        self.dev_label.configure(bg=bg_color, fg=text_color)
-        self.player_label.configure(bg=bg_color, fg=player_color)
-        self.draw_label.configure(bg=bg_color, fg=text_color)
-        self.ai_label.configure(bg=bg_color, fg=ai_color)
-        self.difficulty_label.configure(bg=bg_color, fg=text_color)
-        self.turn_label.configure(bg=bg_color, fg=text_color)
-
-        self.restart_btn.configure(
-            bg=self.theme["control_bg"],
-            fg=self.theme["control_fg"],
-            activebackground=self.theme["control_active"]
-        )
-        self.exit_btn.configure(
+        for widget in (self.window, self.header_frame, self.board_frame, self.control_frame,
+                       self.status_frame, self.score_frame):
+            self._configure(widget, bg=bg_color)
+
+        for label, fg_color in ((self.title_label, text_color), (self.dev_label, text_color),
+                                (self.player_label, player_color), (self.draw_label, text_color),
+                                (self.ai_label, ai_color), (self.difficulty_label, text_color),
+                                (self.turn_label, text_color)):
+            self._configure(label, bg=bg_color, fg=fg_color)
+        self._configure(self.ponder_check, bg=bg_color, fg=text_color, activebackground=bg_color,
+                        activeforeground=text_color, selectcolor=self.theme["btn_bg"])
+
+        for button in (self.restart_btn, self.hint_btn):
+            self._configure(
+                button,
+                bg=self.theme["control_bg"],
+                fg=self.theme["control_fg"],
+                activebackground=self.theme["control_active"]
+            )
+        self._configure(
+            self.exit_btn,
             bg=self.theme["exit_bg"],
             fg=self.theme["exit_fg"],
             activebackground=self.theme["exit_active"]
         )
 
+        self._mark_all_cells_dirty()
         self.update_button_styles()
 
+    def _cell_style(self, r, c, is_win):
+        cell = self.board[r][c]
+        if is_win:
+            return {
+                "bg": self.theme["win"],
+                "fg": self.theme["player"] if cell == self.player_symbol else self.theme["ai"],
+                "relief": "groove",
+            }
+        elif cell == self.player_symbol:
+            return {
+                "text": self.player_symbol,
+                "fg": self.theme["player"],
+                "bg": self.theme["clicked"],
+                "state": "disabled",
+                "relief": "sunken",
+            }
+        elif cell == self.ai_symbol:
+            return {
+                "text": self.ai_symbol,
+                "fg": self.theme["ai"],
+                "bg": self.theme["clicked"],
+                "state": "disabled",
+                "relief": "sunken",
+            }
+        elif self.ultimate and not self._is_playable(r, c):
+            return self._closed_cell_style(r, c)
+        else:
+            return {
+                "text": gl.EMPTY,
+                "fg": self.theme["text"],
+                "bg": self.theme["win"] if (r, c) in self._hint_cells else self.theme["btn_bg"],
+                "state": "normal",
+                "relief": "flat",
+            }
+
+    def _closed_cell_style(self, r, c):
+        """Empty Ultimate cell outside the sub-boards in play; won sub-boards show their owner."""
+        sub = (r // 3) * 3 + c // 3
+        owner = self.board_tracker.sub_board_winner(sub)
+        symbol = gl.EMPTY
+        fg = self.theme["text"]
+        if owner is not None:
+            symbol = gl.PLAYER_X if owner == gl.SYMBOL_SIDES[gl.PLAYER_X] else gl.AI_O
+            fg = self.theme["player"] if symbol == self.player_symbol else self.theme["ai"]
+        return {
+            "text": symbol,
+            "fg": fg,
+            "bg": self.theme["bg"],
+            "state": "disabled",
+            "relief": "flat",
+        }
+
     def update_button_styles(self, winning_line=None):
+        """Restyle only cells marked dirty (plus any winning line), sending only changed options."""
         if winning_line is None:
             winning_line = []
 
-        for r in range(3):
-            for c in range(3):
-                btn = self.buttons[r][c]
-                cell = self.board[r][c]
-                is_win = (r, c) in winning_line
-
-                if is_win:
-                    btn.configure(
-                        bg=self.theme["win"],
-                        fg=self.theme["player"] if cell == self.player_symbol else self.theme["ai"],
-                        relief="groove"
-                    )
-                elif cell == self.player_symbol:
-                    btn.configure(
-                        text=self.player_symbol,
-                        fg=self.theme["player"],
-                        bg=self.theme["clicked"],
-                        state="disabled",
-                        relief="sunken"
-                    )
-                elif cell == self.ai_symbol:
-                    btn.configure(
-                        text=self.ai_symbol,
-                        fg=self.theme["ai"],
-                        bg=self.theme["clicked"],
-                        state="disabled",
-                        relief="sunken"
-                    )
-                else:
-                    btn.configure(
-                        text=gl.EMPTY,
-                        fg=self.theme["text"],
-                        bg=self.theme["btn_bg"],
-                        state="normal",
-                        relief="flat"
-                    )
+        cells = self._dirty_cells
+        cells.update(winning_line)
+        for r, c in cells:
+            applied = self._cell_styles[r][c]
+            wanted = self._cell_style(r, c, (r, c) in winning_line)
+            changed = {k: v for k, v in wanted.items() if applied.get(k) != v}
+            if changed:
+                self._configure(self.buttons[r][c], **changed)
+                applied.update(changed)
+        cells.clear()
 
     def on_hover(self, row, col, is_entering):
         btn = self.buttons[row][col]
-        if self.game_active and self.board[row][col] == gl.EMPTY:
-            btn.configure(bg=self.theme["hover"] if is_entering else self.theme["btn_bg"])
+        if self.game_active and self._is_playable(row, col):
+            bg = self.theme["hover"] if is_entering else self._cell_style(row, col, False)["bg"]
+            self._configure(btn, bg=bg)
+            self._cell_styles[row][col]["bg"] = bg
 
     def change_difficulty(self, selected_difficulty):
         if selected_difficulty in DIFFICULTY_LEVELS:
@@ -443,6 +520,19 @@ class TicTacToeGUI:
             self.difficulty_label.config(text=f"Difficulty: {self.current_difficulty}")
             self.restart_game()
 
+    def change_board_size(self, selected_size_label):
+        ultimate = selected_size_label == gl.ULTIMATE
+        size = gl.UltimateBoard.size if ultimate else BOARD_SIZE_LABELS.get(selected_size_label)
+        if size and (size != self.board_size or ultimate != self.ultimate):
+            self._clear_hint()
+            self.board_size = size
+            self.ultimate = ultimate
+            self.board = gl.init_board(size)
+            self.board_tracker = self._new_tracker()
+            self._build_board_grid()
+            self.update_button_styles()
+            self.restart_game()
+
     def change_theme(self, selected_theme_name):
         if selected_theme_name in self.themes:
             self.current_theme_name = selected_theme_name
@@ -450,43 +540,167 @@ class TicTacToeGUI:
 
     def update_status(self, message=None):
         if message:
-            self.turn_label.config(text=message)
+            self._configure(self.turn_label, text=message)
         else:
             if self.player_symbol:
                 status = "Your turn!" if self.game_active else "Game over"
-                self.turn_label.config(text=status)
+                self._configure(self.turn_label, text=status)
 
     def on_button_click(self, row, col):
         if not self.player_symbol:
             return
+        if self._ai_after_id is not None or self.ai_worker.pending:
+            return
 
-        if self.board[row][col] == gl.EMPTY and self.game_active:
+        if self.game_active and self._is_playable(row, col):
             self._play_sound("click")
-            self.board[row][col] = self.player_symbol
+            self._place(row, col, self.player_symbol)
             self.update_button_styles()
 
             if self.check_game_state():
+                self.ponderer.stop()
+                return
+
+            reply = self.ponderer.take((row, col))
+            if reply is not None:
+                self._play_ai_move(reply)
                 return
 
             self.update_status("AI thinking...")
-            self.window.after(AI_THINK_DELAY_MS, self.perform_ai_move)
+            self._schedule_ai_move(AI_THINK_DELAY_MS)
+
+    def toggle_pondering(self):
+        if self.ponder_var.get():
+            self._start_pondering()
+        else:
+            self.ponderer.stop()
+
+    def _start_pondering(self):
+        """Search replies to the human's possible moves while they think."""
+        if self._ai_after_id is not None or self.ai_worker.pending:
+            return
+        # The ponderer searches list-of-lists boards only, so Ultimate replies aren't pondered.
+        if self.ponder_var.get() and self.game_active and self.player_symbol and not self.ultimate:
+            self.ponderer.start(self.board, self.current_difficulty, self.ai_symbol,
+                                board_size=self.board_size, time_budget_ms=AI_TIME_BUDGET_MS)
+
+    def request_hint(self):
+        """Analyse the position in the background and highlight the best cells."""
+        if not (self.game_active and self.player_symbol):
+            return
+        if self._ai_after_id is not None or self.ai_worker.pending:
+            return
+        if self.ultimate:
+            # No move ratings for Ultimate; suggest the engine's own choice instead.
+            self.hint_worker.submit(self.board_tracker, gl.HARD, self.player_symbol,
+                                    time_budget_ms=AI_TIME_BUDGET_MS)
+        else:
+            self.hint_worker.submit_analysis(self.board, self.player_symbol,
+                                             time_budget_ms=AI_TIME_BUDGET_MS)
+        self.update_status("Thinking about a hint...")
+        self._hint_after_id = self.window.after(AI_POLL_INTERVAL_MS, self._poll_hint_result)
+
+    def _poll_hint_result(self):
+        self._hint_after_id = None
+        result = self.hint_worker.poll()
+        if result is None:
+            if self.hint_worker.pending:
+                self._hint_after_id = self.window.after(AI_POLL_INTERVAL_MS, self._poll_hint_result)
+            return
+        if result.error is not None or not result.move or not self.game_active:
+            if result.error is not None:
+                print(f"Hint analysis error: {result.error}")
+                if self.game_active:
+                    self.update_status("No hint available")
+            return
+        if self.ultimate:
+            self._hint_cells = {result.move}
+            message = "Hint: highlighted move looks strongest"
+        else:
+            best = result.move[0]
+            self._hint_cells = {m.move for m in result.move
+                                if (m.value, m.distance, m.score) == (best.value, best.distance, best.score)}
+            message = self._hint_message(best)
+        self._dirty_cells.update(self._hint_cells)
+        self.update_button_styles()
+        self.update_status(message)
+
+    @staticmethod
+    def _hint_message(best):
+        if best.distance is None:
+            return "Hint: highlighted moves look strongest"
+        if best.value > 0:
+            return f"Hint: you can win in {(best.distance + 1) // 2} move(s)"
+        if best.value < 0:
+            return "Hint: best defence highlighted"
+        return "Hint: highlighted moves hold the draw"
+
+    def _clear_hint(self):
+        if self._hint_after_id is not None:
+            self.window.after_cancel(self._hint_after_id)
+            self._hint_after_id = None
+        self.hint_worker.cancel()
+        self._dirty_cells.update(self._hint_cells)
+        self._hint_cells = set()
+
+    def _schedule_ai_move(self, delay_ms):
+        self._ai_after_id = self.window.after(delay_ms, self.perform_ai_move)
+
+    def _cancel_ai_search(self):
+        if self._ai_after_id is not None:
+            self.window.after_cancel(self._ai_after_id)
+            self._ai_after_id = None
+        self.ai_worker.cancel()
 
     def perform_ai_move(self):
+        self._ai_after_id = None
         if not self.game_active:
             return
 
-        move = gl.ai_move(self.board, self.current_difficulty, self.ai_symbol)
+        position = self.board_tracker if self.ultimate else self.board
+        self.ai_worker.submit(position, self.current_difficulty, self.ai_symbol,
+                              board_size=self.board_size, time_budget_ms=AI_TIME_BUDGET_MS)
+        self._ai_after_id = self.window.after(AI_POLL_INTERVAL_MS, self._poll_ai_result)
+
+    def _poll_ai_result(self):
+        self._ai_after_id = None
+        result = self.ai_worker.poll()
+        if result is None:
+            if self.ai_worker.pending:
+                self._ai_after_id = self.window.after(AI_POLL_INTERVAL_MS, self._poll_ai_result)
+            return
+        if result.error is not None:
+            print(f"AI search error: {result.error}")
+        elif result.stats is not None:
+            self.ai_latency.add(result.stats)
+
+        if not self.game_active:
+            return
+        self._play_ai_move(result.move)
+
+    def _play_ai_move(self, move):
         if move:
             row, col = move
-            self.board[row][col] = self.ai_symbol
+            self._place(row, col, self.ai_symbol)
             self.update_button_styles()
-            self.check_game_state()
-        else:
-             self.check_game_state()
+        if not self.check_game_state():
+            self.update_status("Your turn!")
+            self._start_pondering()
+
 
+    def _place(self, row, col, symbol):
+        if self._hint_cells or self._hint_after_id is not None:
+            self._clear_hint()
+        self.board[row][col] = symbol
+        self._dirty_cells.add((row, col))
+        self.board_tracker.play(row * self.board_size + col, gl.SYMBOL_SIDES[symbol])
+        if self.ultimate:
+            # The move changes which sub-boards are open, so every empty cell may restyle.
+            self._mark_all_cells_dirty()
 
     def check_game_state(self):
-        winning_line = gl.get_winning_line(self.board)
+        # The tracker only re-checks lines through the last move, so this stays O(1) per move.
+        winning_line = self.board_tracker.winning_line()
         if winning_line:
             self.game_active = False
             winner = self.board[winning_line[0][0]][winning_line[0][1]]
@@ -503,37 +717,61 @@ class TicTacToeGUI:
             self.update_scores()
             self.update_button_styles(winning_line)
             self.update_status(status_message)
+            self._record_game(winner)
             return True
 
-        elif gl.is_board_full(self.board):
+        elif self.board_tracker.is_full():
             self.game_active = False
             self.draw_count += 1
             self._play_sound("draw")
             self.update_scores()
             self.update_status("It's a draw!")
             self.update_button_styles()
+            self._record_game(None)
             return True
 
         return False
 
+    def _record_game(self, winner):
+        # The log format has no field for the rules, so Ultimate games aren't recorded.
+        if self.ultimate:
+            return
+        # Logging is best effort: a read-only install shouldn't stop the game.
+        human, ai = None, self.current_difficulty
+        x_player, o_player = (human, ai) if self.player_symbol == gl.PLAYER_X else (ai, human)
+        moves = self.board_tracker.moves
+        # Either side can open, so take the first mover from the board itself.
+        row, col = divmod(moves[0], self.board_size)
+        first_mover = self.board[row][col]
+        try:
+            if self.record_writer is None:
+                self.record_writer = game_record.GameRecordWriter()
+            self.record_writer.append(self.board_size, game_record.player_code(x_player),
+                                      game_record.player_code(o_player),
+                                      game_record.result_code(winner), moves,
+                                      first_mover=first_mover)
+        except (OSError, ValueError) as e:
+            print(f"Could not record game: {e}")
+
     def update_scores(self):
-        self.player_label.config(text=f"Player: {self.player_score}")
-        self.draw_label.config(text=f"Draws: {self.draw_count}")
-        self.ai_label.config(text=f"AI: {self.ai_score}")
+        self._configure(self.player_label, text=f"Player: {self.player_score}")
+        self._configure(self.draw_label, text=f"Draws: {self.draw_count}")
+        self._configure(self.ai_label, text=f"AI: {self.ai_score}")
 
        
     def restart_game(self): 
+        self._cancel_ai_search()
+        self._clear_hint()
+        self.ponderer.stop()
         if not self.player_symbol:
             return 
 
-        if self.sound_enabled:
-            try:
-                pygame.mixer.stop()
-            except pygame.error as e:
-                print(f"Pygame mixer stop error (ignored): {e}")
+        self.sound_bank.stop()
 
         
-        self.board = gl.init_board()
+        self.board = gl.init_board(self.board_size)
+        self.board_tracker = self._new_tracker()
+        self._mark_all_cells_dirty()
         
         self.game_active = True
         
@@ -542,12 +780,18 @@ class TicTacToeGUI:
         
         if self.turn_var.get() == "second":  
             self.update_status("AI's turn")
-            self.window.after(500, self.perform_ai_move)
+            self._schedule_ai_move(500)
         else:  
             self.update_status("Your turn!")
+            self._start_pondering()
        
 
     def quit_game(self):
-        if self.sound_enabled:
-            pygame.mixer.quit()
+        self._cancel_ai_search()
+        self.ai_worker.shutdown()
+        self.hint_worker.shutdown()
+        self.ponderer.shutdown()
+        if self.record_writer is not None:
+            self.record_writer.close()
+        self.sound_bank.close()
         self.window.destroy()
@@ -0,0 +1,143 @@
+"""Load generator for server.py.
+
+    python server.py --workers 4 &
+    python loadgen.py --sessions 2000 --connections 50 --games 2
+
+Each session plays random human moves against the server's AI until its games
+are done. Sessions are spread over a fixed pool of connections and pipeline their
+requests on them. Round-trip latency is reported per request type, as p50/p99 from
+the same histograms the tournament runner prints.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+
+import game_logic as gl
+from search_stats import LatencyHistogram
+from server import DEFAULT_HOST, DEFAULT_PORT
+
+
+class Connection:
+    """A client connection that matches replies to requests by id."""
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count(1)
+        self._waiting = {}
+        self._reader_task = asyncio.ensure_future(self._read_replies())
+
+    @classmethod
+    async def open(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, **request):
+        request["id"] = request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        self._writer.write(json.dumps(request, separators=(",", ":")).encode() + b"\n")
+        await self._writer.drain()
+        reply = await future
+        if not reply.get("ok"):
+            raise RuntimeError(f"{request['op']} failed: {reply.get('error')}")
+        return reply
+
+    async def _read_replies(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                reply = json.loads(line)
+                future = self._waiting.pop(reply.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        finally:
+            error = ConnectionError("server closed the connection")
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._waiting.clear()
+
+    async def close(self):
+        self._writer.close()
+        self._reader_task.cancel()
+
+
+async def _timed(histogram, connection, **request):
+    started = time.perf_counter()
+    reply = await connection.request(**request)
+    histogram.record((time.perf_counter() - started) * 1000)
+    return reply
+
+
+async def play_session(connection, games, size, difficulty, rng, latency):
+    human = rng.choice((gl.PLAYER_X, gl.AI_O))
+    reply = await _timed(latency["new"], connection, op="new", size=size,
+                         difficulty=difficulty, symbol=human)
+    session = reply["session"]
+    state = reply["state"]
+    for game in range(games):
+        if game:
+            state = (await _timed(latency["restart"], connection, op="restart",
+                                  session=session))["state"]
+        while state["result"] is None:
+            if state["to_move"] == human:
+                free = [(r, c) for r, row in enumerate(state["board"])
+                        for c, cell in enumerate(row) if cell == gl.EMPTY]
+                row, col = rng.choice(free)
+                state = (await _timed(latency["move"], connection, op="move", session=session,
+                                      row=row, col=col))["state"]
+            else:
+                state = (await _timed(latency["ai"], connection, op="ai",
+                                      session=session))["state"]
+    await _timed(latency["close"], connection, op="close", session=session)
+
+
+async def run(host, port, sessions, connections, games, size, difficulty, seed):
+    latency = {op: LatencyHistogram() for op in ("new", "move", "ai", "restart", "close")}
+    pool = [await Connection.open(host, port) for _ in range(connections)]
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            play_session(pool[i % connections], games, size, difficulty,
+                         random.Random(rng.getrandbits(32)), latency)
+            for i in range(sessions)
+        ))
+    finally:
+        for connection in pool:
+            await connection.close()
+    return latency, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for the game server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--sessions", type=int, default=1000, help="concurrent sessions")
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--games", type=int, default=1, help="games per session")
+    parser.add_argument("--size", type=int, default=gl.BOARD_SIZE, choices=gl.BOARD_SIZES)
+    parser.add_argument("--difficulty", default=gl.HARD, choices=gl.DIFFICULTIES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    latency, elapsed = asyncio.run(run(args.host, args.port, args.sessions,
+                                       min(args.connections, args.sessions), args.games,
+                                       args.size, args.difficulty, args.seed))
+    requests = sum(len(histogram) for histogram in latency.values())
+    print(f"{args.sessions} sessions x {args.games} games over {args.connections} connections: "
+          f"{requests} requests in {elapsed:.2f} s ({requests / elapsed:.0f} req/s)")
+    for op in ("move", "ai"):
+        print(f"{op} latency: {latency[op].format()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,8 @@
-import tkinter as tk
-from tkinter import messagebox
-from gui import TicTacToeGUI
-
-if __name__ == "__main__":
+def main():
+    # Tk and the GUI are only imported here, so the engine modules stay importable headless.
+    from tkinter import messagebox
     try:
+        from gui import TicTacToeGUI
         game_app = TicTacToeGUI()
     except ImportError as e:
          messagebox.showerror("Import Error", f"Failed to load component: {e}\n\nPlease ensure Pygame is installed (`pip install pygame`).")
@@ -11,3 +10,6 @@ if __name__ == "__main__":
         import traceback
         traceback.print_exc()
         messagebox.showerror("Runtime Error", f"An unexpected error occurred:\n\n{e}\n\nSee console for details.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""Monte Carlo Tree Search (UCT) for N x N boards with K-in-a-row wins.
+
+Same bitboard layout as nk_engine: cell (r, c) is bit r * size + c, one int per
+side. Each iteration walks the tree by UCB1, expands one move, finishes the game
+with uniformly random moves and backs the result up. With `workers` > 1 the
+search is root-parallel: every worker process grows its own tree from the same
+position under the same budget, and their root visit counts are summed.
+
+    python mcts_engine.py --size 9 --time-budget-ms 1000 --workers 4
+"""
+import argparse
+import concurrent.futures
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import nk_engine
+
+EXPLORATION = math.sqrt(2)
+# Iterations between clock / cancel checks.
+_CHECK_INTERVAL = 32
+# Time kept back from each worker's budget for process round trips.
+_POOL_MARGIN_MS = 20
+
+_pool = None
+_pool_workers = 0
+# Set by the parent to stop the pool's searches; each worker gets it at startup.
+_pool_cancel = None
+
+
+class _Node:
+    __slots__ = ("move", "parent", "children", "untried", "visits", "value", "terminal")
+
+    def __init__(self, move, parent, untried, terminal=None):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        # Total reward for the player who moved into this node.
+        self.value = 0.0
+        # 1.0 if that move won, 0.5 if it filled the board, else None.
+        self.terminal = terminal
+
+
+def _playout(to_move, other, free, cell_masks, shuffle):
+    """Random game from here; 1.0 if the side that just moved wins, 0.5 draw, 0.0 loss."""
+    shuffle(free)
+    bits = [to_move, other]
+    side = 0
+    for cell in free:
+        placed = bits[side] | (1 << cell)
+        bits[side] = placed
+        for m in cell_masks[cell]:
+            if placed & m == m:
+                return 1.0 if side else 0.0
+        side ^= 1
+    return 0.5
+
+
+def search(my_bits, opp_bits, size, win_length, time_budget_ms=None, playouts=None, seed=None,
+           cancel_event=None):
+    """Grow one UCT tree for the side owning `my_bits`.
+
+    Stops at the time budget, after `playouts` iterations, or when `cancel_event`
+    is set, whichever comes first. Returns (root visits {cell: (visits, value)},
+    iterations, deepest tree ply).
+    """
+    if time_budget_ms is None and playouts is None:
+        raise ValueError("give a time budget, a playout budget or both")
+    tables = nk_engine.line_tables(size, win_length)
+    cell_masks = tables.cell_masks
+    full = tables.full_mask
+    shuffle = random.Random(seed).shuffle
+    deadline = None if time_budget_ms is None else time.perf_counter() + time_budget_ms / 1000.0
+    limit = math.inf if playouts is None else playouts
+
+    root = _Node(None, None, nk_engine.candidate_moves(my_bits, opp_bits, tables))
+    iterations = 0
+    max_depth = 0
+    while iterations < limit:
+        if iterations % _CHECK_INTERVAL == 0 and iterations:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if cancel_event is not None and cancel_event.is_set():
+                break
+        iterations += 1
+
+        # Selection: `to_move` / `other` track the position as we descend.
+        node = root
+        to_move, other = my_bits, opp_bits
+        depth = 0
+        while not node.untried and node.children and node.terminal is None:
+            log_visits = math.log(node.visits)
+            best = None
+            best_score = -1.0
+            for child in node.children:
+                score = child.value / child.visits + EXPLORATION * math.sqrt(log_visits / child.visits)
+                if score > best_score:
+                    best, best_score = child, score
+            node = best
+            to_move, other = other, to_move | (1 << node.move)
+            depth += 1
+
+        # Expansion.
+        if node.terminal is None and node.untried:
+            cell = node.untried.pop()
+            placed = to_move | (1 << cell)
+            terminal = None
+            for m in cell_masks[cell]:
+                if placed & m == m:
+                    terminal = 1.0
+                    break
+            if terminal is None and placed | other == full:
+                terminal = 0.5
+            untried = None if terminal is not None else \
+                nk_engine.candidate_moves(other, placed, tables)
+            child = _Node(cell, node, untried, terminal)
+            node.children.append(child)
+            node = child
+            to_move, other = other, placed
+            depth += 1
+        if depth > max_depth:
+            max_depth = depth
+
+        # Simulation.
+        if node.terminal is not None:
+            reward = node.terminal
+        elif node.move is None:
+            reward = 0.5
+        else:
+            free = nk_engine.bit_indices(full ^ (to_move | other))
+            reward = _playout(to_move, other, free, cell_masks, shuffle)
+
+        # Backpropagation, flipping the point of view at each ply.
+        while node is not None:
+            node.visits += 1
+            node.value += reward
+            reward = 1.0 - reward
+            node = node.parent
+
+    visits = {child.move: (child.visits, child.value) for child in root.children}
+    return visits, iterations, max_depth
+
+
+def _init_worker(cancel_event):
+    global _pool_cancel
+    _pool_cancel = cancel_event
+
+
+def _search_task(args):
+    # Module-level so the process pool can pickle it.
+    return search(*args, cancel_event=_pool_cancel)
+
+
+def _executor(workers):
+    global _pool, _pool_workers, _pool_cancel
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool_cancel = multiprocessing.Event()
+        _pool = concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker,
+                                                       initargs=(_pool_cancel,))
+        _pool_workers = workers
+    return _pool
+
+
+def _immediate_move(my_bits, opp_bits, tables):
+    """A winning cell, else a cell that blocks the opponent's win, else None."""
+    free = nk_engine.bit_indices(tables.full_mask ^ (my_bits | opp_bits))
+    for bits in (my_bits, opp_bits):
+        for cell in free:
+            if nk_engine.wins_through(bits | (1 << cell), cell, tables):
+                return cell
+    return None
+
+
+def best_move(my_bits, opp_bits, size, win_length, time_budget_ms=None, playouts=None,
+              workers=1, stats=None, cancel_event=None, seed=None):
+    """Most-visited root move for the side owning `my_bits`, or None on a full board.
+
+    Immediate wins and forced blocks are played without searching. With
+    `workers` > 1, each worker searches under the same budgets (a playout budget
+    is split between them) and root visits are merged; setting `cancel_event`
+    stops the workers as well as the wait. Playouts run, the deepest tree ply
+    and source "mcts" go into `stats` if one is given.
+    """
+    tables = nk_engine.line_tables(size, win_length)
+    if not (tables.full_mask ^ (my_bits | opp_bits)):
+        return None
+    if stats is not None:
+        stats.source = "mcts"
+    forced = _immediate_move(my_bits, opp_bits, tables)
+    if forced is not None:
+        return forced
+    if seed is None:
+        seed = random.getrandbits(32)
+
+    if workers <= 1:
+        results = [search(my_bits, opp_bits, size, win_length, time_budget_ms, playouts, seed,
+                          cancel_event)]
+    else:
+        budget = None if time_budget_ms is None else max(1, time_budget_ms - _POOL_MARGIN_MS)
+        share = None if playouts is None else -(-playouts // workers)
+        pool = _executor(workers)
+        _pool_cancel.clear()
+        futures = [pool.submit(_search_task, (my_bits, opp_bits, size, win_length, budget, share,
+                                              seed + i))
+                   for i in range(workers)]
+        pending = set(futures)
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                # Stop the workers too, so the pool is free for the next search; each one
+                # returns its tree so far within _CHECK_INTERVAL iterations.
+                _pool_cancel.set()
+                concurrent.futures.wait(pending)
+                break
+            _, pending = concurrent.futures.wait(pending, timeout=0.02)
+        results = [f.result() for f in futures if not f.cancelled()]
+
+    merged = {}
+    for visits, _, _ in results:
+        for cell, (count, _) in visits.items():
+            merged[cell] = merged.get(cell, 0) + count
+    if stats is not None:
+        stats.nodes += sum(iterations for _, iterations, _ in results)
+        stats.depth = max([stats.depth] + [depth for _, _, depth in results])
+        stats.max_ply = stats.depth
+    if not merged:
+        return nk_engine.candidate_moves(my_bits, opp_bits, tables)[0]
+    return max(merged, key=merged.get)
+
+
+def main(argv=None):
+    from search_stats import SearchStats
+
+    parser = argparse.ArgumentParser(description="MCTS playout-rate check")
+    parser.add_argument("--size", type=int, default=9)
+    parser.add_argument("--win-length", type=int, default=None, help="default: 5, or the size if smaller")
+    parser.add_argument("--time-budget-ms", type=int, default=1000)
+    parser.add_argument("--playouts", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=1, help="0 means one per CPU")
+    args = parser.parse_args(argv)
+
+    win_length = args.win_length or min(args.size, 5)
+    workers = args.workers or os.cpu_count() or 1
+    centre = (args.size // 2) * args.size + args.size // 2
+    stats = SearchStats()
+    started = time.perf_counter()
+    move = best_move(0, 1 << centre, args.size, win_length, args.time_budget_ms, args.playouts,
+                     workers, stats)
+    elapsed = time.perf_counter() - started
+    print(f"{args.size}x{args.size}, {win_length} in a row, {workers} worker(s): move {divmod(move, args.size)}")
+    print(f"  {stats.nodes} playouts in {elapsed:.2f} s = {stats.nodes / elapsed:,.0f} playouts/sec,"
+          f" tree depth {stats.depth}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,357 @@
+"""Search engine for N x N boards with K-in-a-row wins.
+
+Boards are bitboards: cell (r, c) is bit r * size + c, one int per side. The engine
+runs iterative-deepening alpha-beta (negamax) with a heuristic evaluation and stops
+at a hard deadline, returning the best move from the deepest completed iteration.
+"""
+import math
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+from board_state import IncrementalBoard
+
+WIN_SCORE = 1_000_000
+# Value of an open line (no enemy stones) by how many of our stones it holds,
+# relative to the win length: index K - stones, so the last entry is one away from a win.
+_LINE_WEIGHTS_BY_GAP = {1: 1000, 2: 60, 3: 8, 4: 2}
+_DEADLINE_CHECK_INTERVAL = 512
+
+LineTables = namedtuple(
+    "LineTables",
+    "size win_length cell_count full_mask lines masks cell_lines cell_masks neighbour_masks "
+    "cell_weights count_weights",
+)
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+@lru_cache(maxsize=None)
+def line_tables(size, win_length):
+    """Precompute every winning line for a size x size board with `win_length` in a row.
+
+    Lines are ordered rows, columns, diagonals, anti-diagonals, each scanned row-major.
+    """
+    if not 1 <= win_length <= size:
+        raise ValueError(f"win length {win_length} does not fit a {size}x{size} board")
+
+    span = size - win_length + 1
+    lines = []
+    for r in range(size):
+        for c in range(span):
+            lines.append(tuple(r * size + c + k for k in range(win_length)))
+    for c in range(size):
+        for r in range(span):
+            lines.append(tuple((r + k) * size + c for k in range(win_length)))
+    for r in range(span):
+        for c in range(span):
+            lines.append(tuple((r + k) * size + c + k for k in range(win_length)))
+    for r in range(span):
+        for c in range(win_length - 1, size):
+            lines.append(tuple((r + k) * size + c - k for k in range(win_length)))
+
+    masks = tuple(sum(1 << i for i in line) for line in lines)
+    cell_count = size * size
+    cell_lines = tuple(
+        tuple(i for i, m in enumerate(masks) if m >> cell & 1) for cell in range(cell_count)
+    )
+    cell_masks = tuple(tuple(masks[i] for i in lines_through) for lines_through in cell_lines)
+
+    neighbour_masks = []
+    for cell in range(cell_count):
+        r, c = divmod(cell, size)
+        mask = 0
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if 0 <= r + dr < size and 0 <= c + dc < size:
+                    mask |= 1 << ((r + dr) * size + c + dc)
+        neighbour_masks.append(mask)
+
+    # Static move priority: cells on more lines first (centre, then corners, then edges
+    # on 3x3), nearer the centre breaking ties.
+    centre = (size - 1) / 2
+    cell_weights = tuple(
+        len(cell_masks[cell]) * 64 - int(abs(cell // size - centre) + abs(cell % size - centre))
+        for cell in range(cell_count)
+    )
+
+    # evaluate()'s line values indexed by stone count, for incremental scoring.
+    count_weights = (0,) + tuple(
+        _LINE_WEIGHTS_BY_GAP.get(win_length - count, 1) for count in range(1, win_length + 1)
+    )
+
+    return LineTables(size, win_length, cell_count, (1 << cell_count) - 1,
+                      tuple(lines), masks, cell_lines, cell_masks, tuple(neighbour_masks),
+                      cell_weights, count_weights)
+
+
+def bit_indices(mask):
+    indices = []
+    while mask:
+        low = mask & -mask
+        indices.append(low.bit_length() - 1)
+        mask ^= low
+    return indices
+
+
+def has_win(bits, tables):
+    for m in tables.masks:
+        if bits & m == m:
+            return True
+    return False
+
+
+def wins_through(bits, cell, tables):
+    """True if `bits` completes a line through `cell`; only those lines can be new wins."""
+    for m in tables.cell_masks[cell]:
+        if bits & m == m:
+            return True
+    return False
+
+
+def evaluate(my_bits, opp_bits, tables):
+    """Heuristic score for the side to move: open lines weighted by how full they are."""
+    k = tables.win_length
+    score = 0
+    for m in tables.masks:
+        mine = my_bits & m
+        theirs = opp_bits & m
+        if mine and not theirs:
+            score += _LINE_WEIGHTS_BY_GAP.get(k - bin(mine).count("1"), 1)
+        elif theirs and not mine:
+            score -= _LINE_WEIGHTS_BY_GAP.get(k - bin(theirs).count("1"), 1)
+    return score
+
+
+def candidate_moves(my_bits, opp_bits, tables):
+    """Free cells next to an existing stone (or the centre on an empty board)."""
+    occupied = my_bits | opp_bits
+    free = tables.full_mask ^ occupied
+    if not occupied:
+        centre = (tables.size // 2) * tables.size + tables.size // 2
+        return [centre]
+    near = 0
+    for cell in bit_indices(occupied):
+        near |= tables.neighbour_masks[cell]
+    return bit_indices(free & near) or bit_indices(free)
+
+
+class _Search:
+    def __init__(self, board, deadline, max_ply, cancel_event=None):
+        self.board = board
+        self.tables = tables = board.tables
+        self.deadline = deadline
+        self.cancel_event = cancel_event
+        self.nodes = 0
+        self.cutoffs = 0
+        self.max_ply = 0
+        self.killers = [[None, None] for _ in range(max_ply + 1)]
+        self.history = [0] * tables.cell_count
+
+    def out_of_time(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            return True
+        return time.perf_counter() >= self.deadline
+
+    def order_moves(self, moves, ply):
+        """Killer moves first, then history score, then the static cell priority."""
+        history = self.history
+        weights = self.tables.cell_weights
+        killers = self.killers[ply]
+
+        def priority(cell):
+            if cell == killers[0]:
+                return (2, 0, 0)
+            if cell == killers[1]:
+                return (1, 0, 0)
+            return (0, history[cell], weights[cell])
+
+        moves.sort(key=priority, reverse=True)
+        return moves
+
+    def record_cutoff(self, cell, ply, depth):
+        self.cutoffs += 1
+        killers = self.killers[ply]
+        if killers[0] != cell:
+            killers[1] = killers[0]
+            killers[0] = cell
+        self.history[cell] += depth * depth
+
+    def negamax(self, side, depth, ply, alpha, beta):
+        self.nodes += 1
+        if ply > self.max_ply:
+            self.max_ply = ply
+        if self.nodes % _DEADLINE_CHECK_INTERVAL == 0 and self.out_of_time():
+            raise SearchTimeout
+
+        board = self.board
+        if board.is_full():
+            return 0
+        if depth == 0:
+            return board.score if side == 0 else -board.score
+
+        best = -math.inf
+        bits = board.bits
+        moves = self.order_moves(candidate_moves(bits[side], bits[1 - side], self.tables), ply)
+        for index, cell in enumerate(moves):
+            if board.play(cell, side):
+                score = WIN_SCORE - ply
+            elif index == 0 or alpha == -math.inf:
+                score = -self.negamax(1 - side, depth - 1, ply + 1, -beta, -alpha)
+            else:
+                # Principal-variation search: prove the move is no better with a null window,
+                # and only re-search at full width when that fails.
+                score = -self.negamax(1 - side, depth - 1, ply + 1, -alpha - 1, -alpha)
+                if alpha < score < beta:
+                    score = -self.negamax(1 - side, depth - 1, ply + 1, -beta, -alpha)
+            board.undo()
+            if score > best:
+                best = score
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                self.record_cutoff(cell, ply, depth)
+                break
+        return best
+
+    def root(self, depth, moves):
+        """Search the root (side 0 to move) to `depth`; returns (best cell, score)."""
+        board = self.board
+        best_score = -math.inf
+        best_move = moves[0]
+        alpha = -math.inf
+        for index, cell in enumerate(moves):
+            if board.play(cell, 0):
+                board.undo()
+                return cell, WIN_SCORE
+            # A SearchTimeout leaves moves on the board; the caller discards it then.
+            if index == 0:
+                score = -self.negamax(1, depth - 1, 1, -math.inf, -alpha)
+            else:
+                score = -self.negamax(1, depth - 1, 1, -alpha - 1, -alpha)
+                if score > alpha:
+                    score = -self.negamax(1, depth - 1, 1, -math.inf, -alpha)
+            board.undo()
+            if score > best_score:
+                best_score = score
+                best_move = cell
+            if best_score > alpha:
+                alpha = best_score
+        return best_move, best_score
+
+    def root_scores(self, depth, moves):
+        """Exact (full-window) score of every root move at `depth`, as {cell: score}."""
+        board = self.board
+        scores = {}
+        for cell in moves:
+            if board.play(cell, 0):
+                scores[cell] = WIN_SCORE
+            else:
+                scores[cell] = -self.negamax(1, depth - 1, 1, -math.inf, math.inf)
+            board.undo()
+        return scores
+
+
+def _board_for(my_bits, opp_bits, tables):
+    """IncrementalBoard with the side to move as side 0."""
+    board = IncrementalBoard(tables, tables.count_weights)
+    for cell in bit_indices(my_bits):
+        board.play(cell, 0)
+    for cell in bit_indices(opp_bits):
+        board.play(cell, 1)
+    return board
+
+
+def score_moves(my_bits, opp_bits, size, win_length, time_budget_ms, cancel_event=None):
+    """Score every candidate move for the side owning `my_bits` within `time_budget_ms`.
+
+    Returns ({cell: score}, depth) from the deepest completed iteration. Scores at or
+    beyond +/-(WIN_SCORE - remaining cells) are proven wins/losses; see
+    plies_to_result. Costlier than best_move, since no move is cut off early.
+    """
+    tables = line_tables(size, win_length)
+    deadline = time.perf_counter() + time_budget_ms / 1000.0
+    free = tables.full_mask ^ (my_bits | opp_bits)
+    if not free:
+        return {}, 0
+    remaining = len(bit_indices(free))
+    search = _Search(_board_for(my_bits, opp_bits, tables), deadline, remaining, cancel_event)
+    moves = search.order_moves(candidate_moves(my_bits, opp_bits, tables), 0)
+    # Depth 1 always completes, so there is an answer even on a tiny budget.
+    scores = {cell: evaluate_after(my_bits, opp_bits, cell, tables) for cell in moves}
+    completed = 0
+    for depth in range(1, remaining + 1):
+        try:
+            scores = search.root_scores(depth, moves)
+        except SearchTimeout:
+            break
+        completed = depth
+        moves.sort(key=scores.get, reverse=True)
+        if all(abs(score) >= WIN_SCORE - remaining for score in scores.values()):
+            break
+        if search.out_of_time():
+            break
+    return scores, completed
+
+
+def evaluate_after(my_bits, opp_bits, cell, tables):
+    """Static score of playing `cell`, from the mover's point of view."""
+    placed = my_bits | (1 << cell)
+    if wins_through(placed, cell, tables):
+        return WIN_SCORE
+    return -evaluate(opp_bits, placed, tables)
+
+
+def plies_to_result(score, cell_count):
+    """(value, plies) for a proven root score: value +1 win / -1 loss; None if unproven."""
+    if abs(score) < WIN_SCORE - cell_count:
+        return None
+    return (1 if score > 0 else -1), WIN_SCORE - abs(score) + 1
+
+
+def best_move(my_bits, opp_bits, size, win_length, time_budget_ms, max_depth=None, stats=None,
+              cancel_event=None):
+    """Best cell index for the side owning `my_bits`, found within `time_budget_ms`.
+
+    Deepens one ply at a time; when the deadline hits mid-iteration, the result of
+    the last completed iteration is returned. Setting `cancel_event` (a
+    threading.Event) ends the search the same way. Returns None on a full board.
+    Node/cutoff counts, the deepest completed iteration and the deepest ply reached
+    are added to `stats` if one is given.
+    """
+    tables = line_tables(size, win_length)
+    deadline = time.perf_counter() + time_budget_ms / 1000.0
+    moves = candidate_moves(my_bits, opp_bits, tables)
+    if not (tables.full_mask ^ (my_bits | opp_bits)):
+        return None
+
+    remaining = len(bit_indices(tables.full_mask ^ (my_bits | opp_bits)))
+    search = _Search(_board_for(my_bits, opp_bits, tables), deadline, remaining, cancel_event)
+    moves = search.order_moves(moves, 0)
+    best = moves[0]
+    completed_depth = 0
+    depth_limit = remaining if max_depth is None else min(max_depth, remaining)
+
+    for depth in range(1, depth_limit + 1):
+        try:
+            move, score = search.root(depth, moves)
+        except SearchTimeout:
+            break
+        best = move
+        completed_depth = depth
+        # Search the previous best first next time round; it sharpens the cutoffs.
+        moves.remove(move)
+        moves.insert(0, move)
+        if abs(score) >= WIN_SCORE - remaining:
+            break
+        if search.out_of_time():
+            break
+
+    if stats is not None:
+        stats.nodes += search.nodes
+        stats.cutoffs += search.cutoffs
+        stats.depth = max(stats.depth, completed_depth)
+        stats.max_ply = max(stats.max_ply, search.max_ply)
+    return best
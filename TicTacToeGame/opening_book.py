@@ -0,0 +1,187 @@
+"""Opening books for the larger boards.
+
+A book holds the Hard engine's reply for every position the AI can face in the
+first few plies, whichever side it plays. Positions are keyed on their
+symmetry-canonical form (symmetry.canonical_form), so each of the up to eight
+equivalent positions is stored once. File layout:
+
+    header  magic, version, board size, win length, key bytes, record count
+    records sorted (mover bits, opponent bits) keys, each followed by one move byte
+
+Keys are big-endian, so byte order matches integer order and lookup is a binary
+search over the memory-mapped file. Run this module as a script to build books:
+
+    python opening_book.py --size 7 --depth 3 --time-budget-ms 2000
+"""
+import argparse
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+
+import game_logic as gl
+import nk_engine
+from symmetry import canonical_form, inverse_permutations, transform_bits
+
+MAGIC = b"TTTB"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHHHHI")
+DEFAULT_DEPTH = 3
+DEFAULT_BUILD_BUDGET_MS = 2000
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# Loaded books by board size; None records a missing or unreadable file.
+_books = {}
+
+
+def default_path(size):
+    return os.path.join(DATA_DIR, f"book_{size}x{size}.bin")
+
+
+def key_bytes(size):
+    return (size * size + 7) // 8
+
+
+def _key(mover_bits, opponent_bits, size):
+    width = key_bytes(size)
+    return mover_bits.to_bytes(width, "big") + opponent_bits.to_bytes(width, "big")
+
+
+def _walk(size, depth, reply):
+    """Yield (mover, opponent, canonical move) for every book position, shallowest first."""
+    tables = nk_engine.line_tables(size, gl.win_length_for(size))
+    seen = set()
+    # Frontier positions are (mover, opponent, ai_to_move); the AI may move first or second.
+    frontier = [(0, 0, True), (0, 0, False)]
+    for stones in range(depth):
+        ai_positions = []
+        next_frontier = []
+        for mover, opponent, ai_to_move in frontier:
+            a, b, _ = canonical_form(mover, opponent, size)
+            if (a, b, ai_to_move) in seen:
+                continue
+            seen.add((a, b, ai_to_move))
+            if ai_to_move:
+                ai_positions.append((a, b))
+            else:
+                free = tables.full_mask ^ (a | b)
+                for cell in nk_engine.bit_indices(free):
+                    placed = a | (1 << cell)
+                    if not nk_engine.wins_through(placed, cell, tables):
+                        next_frontier.append((b, placed, True))
+        for (a, b), cell in zip(ai_positions, reply(ai_positions)):
+            yield a, b, cell
+            placed = a | (1 << cell)
+            if not nk_engine.wins_through(placed, cell, tables):
+                next_frontier.append((b, placed, False))
+        frontier = next_frontier
+
+
+def _search_task(args):
+    mover, opponent, size, budget = args
+    return nk_engine.best_move(mover, opponent, size, gl.win_length_for(size), budget)
+
+
+def build_entries(size, depth=DEFAULT_DEPTH, time_budget_ms=DEFAULT_BUILD_BUDGET_MS, workers=None):
+    """Search every book position; returns a sorted list of (key, move) pairs."""
+    with multiprocessing.Pool(workers or os.cpu_count() or 1) as pool:
+        def reply(positions):
+            return pool.map(_search_task, [(a, b, size, time_budget_ms) for a, b in positions])
+        entries = {_key(a, b, size): cell for a, b, cell in _walk(size, depth, reply)}
+    return sorted(entries.items())
+
+
+def write_book(size, path=None, depth=DEFAULT_DEPTH, time_budget_ms=DEFAULT_BUILD_BUDGET_MS,
+               workers=None):
+    path = path or default_path(size)
+    entries = build_entries(size, depth, time_budget_ms, workers)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, size, gl.win_length_for(size),
+                             key_bytes(size), len(entries)))
+        for key, cell in entries:
+            f.write(key)
+            f.write(bytes((cell,)))
+    return path, len(entries)
+
+
+class OpeningBook:
+    """A memory-mapped book file."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, self.win_length, width, self.count = \
+            _HEADER.unpack_from(self._data, 0)
+        self._key_size = 2 * width
+        self._record_size = self._key_size + 1
+        if magic != MAGIC or version != FORMAT_VERSION or \
+                len(self._data) != _HEADER.size + self.count * self._record_size:
+            raise ValueError(f"unrecognised opening book '{path}'")
+
+    def __len__(self):
+        return self.count
+
+    def _find(self, key):
+        data = self._data
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = _HEADER.size + mid * self._record_size
+            probe = data[start:start + self._key_size]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return data[start + self._key_size]
+        return None
+
+    def lookup(self, mover_bits, opponent_bits):
+        """Book cell for the side to move, or None if the position is not in the book."""
+        a, b, k = canonical_form(mover_bits, opponent_bits, self.size)
+        cell = self._find(_key(a, b, self.size))
+        if cell is None:
+            return None
+        # Map the canonical move back through the inverse of the symmetry used.
+        return transform_bits(1 << cell, inverse_permutations(self.size)[k]).bit_length() - 1
+
+
+def lookup(mover_bits, opponent_bits, size):
+    """Book move for this position from the default book file, or None."""
+    if size not in _books:
+        try:
+            book = OpeningBook(default_path(size))
+            if book.win_length != gl.win_length_for(size):
+                raise ValueError(f"book is for {book.win_length} in a row")
+        except FileNotFoundError:
+            book = None
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not load opening book for {size}x{size} ({e}); searching instead.")
+            book = None
+        _books[size] = book
+    book = _books[size]
+    return None if book is None else book.lookup(mover_bits, opponent_bits)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build opening books for the larger boards")
+    parser.add_argument("--size", type=int, nargs="+",
+                        default=[n for n in gl.BOARD_SIZES if n != gl.BOARD_SIZE])
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH,
+                        help="book positions with fewer than this many stones")
+    parser.add_argument("--time-budget-ms", type=int, default=DEFAULT_BUILD_BUDGET_MS,
+                        help="search time per book position")
+    parser.add_argument("--workers", type=int, default=None, help="default: one per CPU")
+    args = parser.parse_args(argv)
+    for size in args.size:
+        path, count = write_book(size, depth=args.depth, time_budget_ms=args.time_budget_ms,
+                                 workers=args.workers)
+        print(f"Wrote {count} positions to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
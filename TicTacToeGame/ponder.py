@@ -0,0 +1,91 @@
+import queue
+import threading
+
+import game_logic as gl
+import nk_engine
+
+
+class Ponderer:
+    """Searches the AI's replies to every human move while the human is thinking.
+
+    start() begins pondering a position with the human to move. When the human
+    moves, take(move) returns the reply already found for it (or None) and stops
+    the rest of the work. Replies are searched on a background thread, most
+    likely human moves (those next to existing stones) first.
+    """
+
+    def __init__(self):
+        self._requests = queue.Queue()
+        self._lock = threading.Lock()
+        self._replies = {}
+        self._generation = 0
+        self._cancel_event = threading.Event()
+        self.hits = 0
+        self.misses = 0
+        self._thread = threading.Thread(target=self._run, name="ai-ponder", daemon=True)
+        self._thread.start()
+
+    def start(self, board, difficulty, ai_symbol, **kwargs):
+        self.stop()
+        with self._lock:
+            self._generation += 1
+            self._replies = {}
+            generation = self._generation
+        self._cancel_event = threading.Event()
+        snapshot = [row[:] for row in board]
+        self._requests.put((generation, self._cancel_event, snapshot, difficulty, ai_symbol, kwargs))
+
+    def stop(self):
+        self._cancel_event.set()
+
+    def take(self, move):
+        """The pondered AI reply to the human playing `move`, or None; stops pondering."""
+        self.stop()
+        with self._lock:
+            reply = self._replies.get(tuple(move))
+            self._replies = {}
+            self._generation += 1
+        if reply is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return reply
+
+    def shutdown(self):
+        self.stop()
+        self._requests.put(None)
+
+    @staticmethod
+    def _human_moves(board):
+        size = len(board)
+        moves = gl.get_available_moves(board)
+        if size == gl.BOARD_SIZE:
+            return moves
+        tables = nk_engine.line_tables(size, gl.win_length_for(size))
+        x_bits, o_bits = gl.board_to_bitboards(board, gl.PLAYER_X, gl.AI_O)
+        near = set(nk_engine.candidate_moves(x_bits, o_bits, tables))
+        return sorted(moves, key=lambda m: (m[0] * size + m[1]) not in near)
+
+    def _run(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            generation, cancel_event, board, difficulty, ai_symbol, kwargs = request
+            human_symbol = gl.PLAYER_X if ai_symbol == gl.AI_O else gl.AI_O
+            for row, col in self._human_moves(board):
+                if cancel_event.is_set():
+                    break
+                board[row][col] = human_symbol
+                try:
+                    if gl.get_winning_line(board) is None and not gl.is_board_full(board):
+                        reply = gl.ai_move(board, difficulty, ai_symbol, cancel_event=cancel_event, **kwargs)
+                        # A cancelled search returns early with a weaker move; never keep it.
+                        if not cancel_event.is_set():
+                            with self._lock:
+                                if generation == self._generation:
+                                    self._replies[(row, col)] = reply
+                except Exception as e:
+                    print(f"Ponder search error: {e}")
+                finally:
+                    board[row][col] = gl.EMPTY
@@ -0,0 +1,90 @@
+import bisect
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended.
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class SearchStats:
+    """Counters filled in by ai_move / a search when one is passed in.
+
+    Searches skip all bookkeeping when no stats object is given. `source` says how
+    the move was chosen: "random", "rule", "table", "book", "search" or "mcts".
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.cutoffs = 0
+        self.depth = 0
+        self.max_ply = 0
+        self.tt_hits = 0
+        self.elapsed_ms = 0.0
+        self.source = None
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v!r}" for k, v in vars(self).items())
+        return f"SearchStats({fields})"
+
+
+class LatencyHistogram:
+    """Per-move latency histogram that can be filled from SearchStats and merged."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.nodes = 0
+
+    def __len__(self):
+        return sum(self.counts)
+
+    def record(self, latency_ms, nodes=0):
+        self.counts[bisect.bisect_left(self.bounds, latency_ms)] += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+        self.nodes += nodes
+
+    def add(self, stats):
+        self.record(stats.elapsed_ms, stats.nodes)
+
+    def merge(self, other):
+        if other.bounds != self.bounds:
+            raise ValueError("cannot merge histograms with different buckets")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        self.nodes += other.nodes
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of samples."""
+        total = len(self)
+        if not total:
+            return 0.0
+        target = fraction * total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.bounds[i], self.max_ms) if i < len(self.bounds) else self.max_ms
+        return self.max_ms
+
+    def format(self):
+        total = len(self)
+        if not total:
+            return "no samples"
+        lines = [f"{total} moves, mean {self.total_ms / total:.2f} ms, "
+                 f"p50 <= {self.percentile(0.5):g} ms, p99 <= {self.percentile(0.99):g} ms, "
+                 f"max {self.max_ms:.2f} ms"]
+        if self.nodes and self.total_ms:
+            lines[0] += f", {self.nodes / self.total_ms * 1000:,.0f} nodes/sec"
+        lower = 0
+        for i, count in enumerate(self.counts):
+            upper = self.bounds[i] if i < len(self.bounds) else None
+            if count:
+                label = f"{lower}-{upper} ms" if upper is not None else f">{lower} ms"
+                lines.append(f"  {label:>14}: {count}")
+            lower = upper
+        return "\n".join(lines)
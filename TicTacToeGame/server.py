@@ -0,0 +1,307 @@
+"""Asyncio game server: many concurrent games over line-delimited JSON.
+
+    python server.py --port 8765 --workers 4
+
+Each request is one JSON object per line and gets exactly one JSON line back.
+Requests may carry an "id", which is echoed in the reply, and a connection may
+pipeline as many requests as it likes; replies can come back out of order.
+
+    {"op": "new", "size": 3, "difficulty": "Hard", "symbol": "X"}
+    {"op": "move", "session": 1, "row": 0, "col": 2}
+    {"op": "ai", "session": 1}
+    {"op": "state", "session": 1}
+    {"op": "restart", "session": 1}
+    {"op": "close", "session": 1}
+
+Replies are {"ok": true, ...} with the game state, or {"ok": false, "error": ...}.
+X always moves first; after "new" or "restart", send "ai" if the AI holds X.
+With --record PATH, every finished game is appended to a game_record log.
+AI searches run in a process pool, so a slow search never stalls other
+connections; only the 3x3 table lookups for Easy, Medium and Hard run inline.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import sys
+
+import game_logic as gl
+import game_record
+import nk_engine
+from game_state import GameState
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Upper bound on one request line; anything longer closes the connection.
+MAX_LINE_BYTES = 4096
+
+_OTHER = {gl.PLAYER_X: gl.AI_O, gl.AI_O: gl.PLAYER_X}
+_SIDE_SYMBOLS = (gl.PLAYER_X, gl.AI_O)
+# Levels whose 3x3 replies are cheap enough to compute on the event loop.
+_INLINE_DIFFICULTIES = (gl.EASY, gl.MEDIUM, gl.HARD)
+RESULT_DRAW = "draw"
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class Session(GameState):
+    """One game: a GameState plus the session's settings and outcome."""
+
+    __slots__ = ("difficulty", "human", "result", "busy", "moves")
+
+    def __init__(self, size, difficulty, human):
+        super().__init__(size)
+        self.difficulty = difficulty
+        self.human = human
+        self.reset()
+
+    def reset(self):
+        self.clear_board()
+        self.result = None
+        self.busy = False
+        self.moves = []
+
+    @property
+    def ai(self):
+        return _OTHER[self.human]
+
+    @property
+    def symbol_to_move(self):
+        return _SIDE_SYMBOLS[self.to_move]
+
+    def play_symbol(self, row, col, symbol):
+        size = self.size
+        if self.result is not None:
+            raise ProtocolError("game is over")
+        if symbol != self.symbol_to_move:
+            raise ProtocolError(f"it is {self.symbol_to_move}'s turn")
+        if not (0 <= row < size and 0 <= col < size):
+            raise ProtocolError("move is off the board")
+        if self.cell_side(row, col) is not None:
+            raise ProtocolError("cell is taken")
+        self.play(row, col)
+
+        cell = row * size + col
+        self.moves.append(cell)
+        tables = nk_engine.line_tables(size, gl.win_length_for(size))
+        if nk_engine.wins_through(self.side_bits(gl.SYMBOL_SIDES[symbol]), cell, tables):
+            self.result = symbol
+            if symbol == self.human:
+                self.player_score += 1
+            else:
+                self.ai_score += 1
+        elif self.move_count == size * size:
+            self.result = RESULT_DRAW
+            self.draw_count += 1
+
+    def to_dict(self):
+        winning_line = None
+        if self.result is not None and self.result != RESULT_DRAW:
+            winning_line = gl.get_winning_line(self)
+        return {
+            "board": ["".join(row) for row in gl.to_board(self)],
+            "size": self.size,
+            "difficulty": self.difficulty,
+            "human": self.human,
+            "to_move": None if self.result is not None else self.symbol_to_move,
+            "result": self.result,
+            "winning_line": winning_line,
+            "scores": {"player": self.player_score, "ai": self.ai_score, "draws": self.draw_count},
+        }
+
+
+class SessionStore:
+    """Sessions by integer id."""
+
+    def __init__(self):
+        self._sessions = {}
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def create(self, size, difficulty, human):
+        self._next_id += 1
+        self._sessions[self._next_id] = Session(size, difficulty, human)
+        return self._next_id
+
+    def get(self, session_id):
+        session = self._sessions.get(session_id) if isinstance(session_id, int) else None
+        if session is None:
+            raise ProtocolError(f"unknown session {session_id!r}")
+        return session
+
+    def remove(self, session_id):
+        self.get(session_id)
+        del self._sessions[session_id]
+
+
+def _search(board, difficulty, ai_symbol, time_budget_ms):
+    # Module-level so the process pool can pickle it.
+    return gl.ai_move(board, difficulty, ai_symbol, time_budget_ms=time_budget_ms)
+
+
+class GameServer:
+    def __init__(self, executor=None, time_budget_ms=gl.DEFAULT_TIME_BUDGET_MS, record_writer=None):
+        self.sessions = SessionStore()
+        self.executor = executor
+        self.time_budget_ms = time_budget_ms
+        self.record_writer = record_writer
+        self.connections = 0
+
+    async def handle_connection(self, reader, writer):
+        self.connections += 1
+        tasks = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    break
+                if not line:
+                    break
+                task = asyncio.ensure_future(self._reply(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _reply(self, line, writer):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ProtocolError("request must be a JSON object")
+            request_id = request.get("id")
+            response = await self.dispatch(request)
+            response["ok"] = True
+        except ProtocolError as e:
+            response = {"ok": False, "error": str(e)}
+        except json.JSONDecodeError as e:
+            response = {"ok": False, "error": f"bad JSON: {e}"}
+        except Exception as e:
+            response = {"ok": False, "error": f"internal error: {e!r}"}
+        if request_id is not None:
+            response["id"] = request_id
+        writer.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+        await writer.drain()
+
+    async def dispatch(self, request):
+        op = request.get("op")
+        if op == "new":
+            size = request.get("size", gl.BOARD_SIZE)
+            difficulty = request.get("difficulty", gl.HARD)
+            human = request.get("symbol", gl.PLAYER_X)
+            if size not in gl.BOARD_SIZES:
+                raise ProtocolError(f"size must be one of {list(gl.BOARD_SIZES)}")
+            if difficulty not in gl.DIFFICULTIES:
+                raise ProtocolError(f"difficulty must be one of {list(gl.DIFFICULTIES)}")
+            if human not in _OTHER:
+                raise ProtocolError("symbol must be 'X' or 'O'")
+            session_id = self.sessions.create(size, difficulty, human)
+            return {"session": session_id, "state": self.sessions.get(session_id).to_dict()}
+
+        session_id = request.get("session")
+        session = self.sessions.get(session_id)
+        if op == "state":
+            pass
+        elif op == "move":
+            row, col = request.get("row"), request.get("col")
+            if not (isinstance(row, int) and isinstance(col, int)):
+                raise ProtocolError("move needs integer row and col")
+            if session.busy:
+                raise ProtocolError("AI is still thinking")
+            self._play(session, row, col, session.human)
+        elif op == "ai":
+            return {"move": await self._ai_move(session), "state": session.to_dict()}
+        elif op == "restart":
+            if session.busy:
+                raise ProtocolError("AI is still thinking")
+            session.reset()
+        elif op == "close":
+            self.sessions.remove(session_id)
+            return {"session": session_id}
+        else:
+            raise ProtocolError(f"unknown op {op!r}")
+        return {"state": session.to_dict()}
+
+    async def _ai_move(self, session):
+        if session.busy:
+            raise ProtocolError("AI is already thinking")
+        if session.result is not None or session.symbol_to_move != session.ai:
+            raise ProtocolError("it is not the AI's turn")
+        if session.size == gl.BOARD_SIZE and session.difficulty in _INLINE_DIFFICULTIES:
+            # 3x3 replies below Monte Carlo are pre-solved table lookups, far cheaper than a
+            # pool round trip. Monte Carlo searches for its whole budget, so it goes to the pool.
+            row, col = _search(session, session.difficulty, session.ai, self.time_budget_ms)
+        else:
+            session.busy = True
+            try:
+                loop = asyncio.get_running_loop()
+                row, col = await loop.run_in_executor(
+                    self.executor, _search, session.copy(), session.difficulty, session.ai,
+                    self.time_budget_ms)
+            finally:
+                session.busy = False
+        self._play(session, row, col, session.ai)
+        return [row, col]
+
+    def _play(self, session, row, col, symbol):
+        session.play_symbol(row, col, symbol)
+        if session.result is None or self.record_writer is None:
+            return
+        human, ai = None, session.difficulty
+        x_player, o_player = (human, ai) if session.human == gl.PLAYER_X else (ai, human)
+        winner = None if session.result == RESULT_DRAW else session.result
+        try:
+            self.record_writer.append(session.size, game_record.player_code(x_player),
+                                      game_record.player_code(o_player),
+                                      game_record.result_code(winner), session.moves)
+        except OSError as e:
+            print(f"Could not record game: {e}")
+
+
+async def serve(host, port, workers, time_budget_ms, record_path=None):
+    record_writer = game_record.GameRecordWriter(record_path) if record_path else None
+    try:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            game_server = GameServer(executor, time_budget_ms, record_writer)
+            server = await asyncio.start_server(game_server.handle_connection, host, port,
+                                                limit=MAX_LINE_BYTES)
+            print(f"Serving on {host}:{port} with {workers} search workers")
+            async with server:
+                await server.serve_forever()
+    finally:
+        if record_writer is not None:
+            record_writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-session tic-tac-toe server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="default: one per CPU")
+    parser.add_argument("--time-budget-ms", type=int, default=gl.DEFAULT_TIME_BUDGET_MS)
+    parser.add_argument("--record", metavar="PATH", help="binary game log to append finished games to")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers or os.cpu_count() or 1,
+                          args.time_budget_ms, args.record))
+    except KeyboardInterrupt:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
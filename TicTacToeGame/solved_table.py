@@ -0,0 +1,128 @@
+"""Precomputed solution of 3x3 tic-tac-toe.
+
+Every position reachable from the empty board (with either side moving first) is
+solved once by backward induction and stored as one uint16 per position:
+
+    bits 0-8    mask of optimal moves for the side to move
+    bits 9-10   value for the side to move (see VALUE_* below, 0 = not reachable)
+    bits 11-14  plies until the game ends under optimal play
+
+Positions are indexed by base-3 digits: a cell is 1 for the side to move, 2 for
+the opponent. Run this module as a script to (re)build the data file.
+"""
+import mmap
+import os
+import struct
+import sys
+
+import game_logic as gl
+
+VALUE_WIN = 1
+VALUE_DRAW = 2
+VALUE_LOSS = 3
+_VALUE_SCORE = {VALUE_WIN: 1, VALUE_DRAW: 0, VALUE_LOSS: -1}
+
+MAGIC = b"TTTS"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHH")
+_ENTRY = struct.Struct("<H")
+ENTRY_COUNT = 3 ** gl.CELL_COUNT
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "solved_3x3.bin")
+
+_TERNARY = tuple(sum(3 ** i for i in gl._MASK_TO_INDICES[bits]) for bits in range(gl.FULL_MASK + 1))
+
+_table = None
+
+
+def position_index(mover_bits, opponent_bits):
+    return _TERNARY[mover_bits] + 2 * _TERNARY[opponent_bits]
+
+
+def _reachable_positions():
+    """All (mover, opponent) pairs reachable by legal play from the empty board."""
+    seen = {(0, 0)}
+    frontier = [(0, 0)]
+    while frontier:
+        next_frontier = []
+        for mover, opponent in frontier:
+            if gl._WIN_TABLE[opponent]:
+                continue
+            free = gl.FULL_MASK ^ (mover | opponent)
+            for i in gl._MASK_TO_INDICES[free]:
+                child = (opponent, mover | (1 << i))
+                if child not in seen:
+                    seen.add(child)
+                    next_frontier.append(child)
+        frontier = next_frontier
+    return seen
+
+
+def build_entries():
+    """Solve every reachable position, deepest layer first."""
+    positions = sorted(_reachable_positions(), key=lambda p: -bin(p[0] | p[1]).count("1"))
+    solved = {}
+    entries = [0] * ENTRY_COUNT
+
+    for mover, opponent in positions:
+        free = gl.FULL_MASK ^ (mover | opponent)
+        if gl._WIN_TABLE[opponent]:
+            score, distance, best_mask = -1, 0, 0
+        elif not free:
+            score, distance, best_mask = 0, 0, 0
+        else:
+            results = []
+            for i in gl._MASK_TO_INDICES[free]:
+                child_score, child_distance = solved[(opponent, mover | (1 << i))]
+                results.append((i, -child_score, child_distance + 1))
+            score = max(r[1] for r in results)
+            best = [r for r in results if r[1] == score]
+            best_mask = sum(1 << r[0] for r in best)
+            distances = [r[2] for r in best]
+            distance = min(distances) if score > 0 else max(distances)
+
+        solved[(mover, opponent)] = (score, distance)
+        value = VALUE_WIN if score > 0 else VALUE_LOSS if score < 0 else VALUE_DRAW
+        entries[position_index(mover, opponent)] = best_mask | value << 9 | distance << 11
+
+    return entries
+
+
+def write_table(path=DEFAULT_PATH):
+    entries = build_entries()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0))
+        f.write(struct.pack(f"<{ENTRY_COUNT}H", *entries))
+    return path
+
+
+def _load(path=DEFAULT_PATH):
+    """Memory-map the table file, falling back to solving in memory if it is missing."""
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _ = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or len(data) != _HEADER.size + 2 * ENTRY_COUNT:
+            raise ValueError(f"unrecognised solved table '{path}'")
+        return data
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not load solved table ({e}); solving in memory.")
+        return _HEADER.pack(MAGIC, FORMAT_VERSION, 0) + struct.pack(f"<{ENTRY_COUNT}H", *build_entries())
+
+
+def lookup(mover_bits, opponent_bits):
+    """Return (score, distance, best_move_mask) for the side to move, or None if unreachable."""
+    global _table
+    if _table is None:
+        _table = _load()
+    entry = _ENTRY.unpack_from(_table, _HEADER.size + 2 * position_index(mover_bits, opponent_bits))[0]
+    value = entry >> 9 & 3
+    if not value:
+        return None
+    return _VALUE_SCORE[value], entry >> 11 & 15, entry & gl.FULL_MASK
+
+
+if __name__ == "__main__":
+    out_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+    print(f"Wrote solved table to {write_table(out_path)}")
@@ -0,0 +1,73 @@
+import os
+
+SOUNDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sounds")
+SOUND_NAMES = ("click", "win", "lose", "draw")
+
+
+class SoundBank:
+    """Decodes each game sound once and plays it on its own reserved mixer channel.
+
+    pygame is imported on load(), so importing this module never pulls it in.
+    """
+
+    def __init__(self, sounds_dir=SOUNDS_DIR, names=SOUND_NAMES):
+        self.sounds_dir = sounds_dir
+        self.names = names
+        self.enabled = False
+        self._mixer = None
+        self._sounds = {}
+        self._channels = {}
+
+    def load(self):
+        try:
+            import pygame
+        except ImportError:
+            return False
+
+        paths = {name: os.path.join(self.sounds_dir, f"{name}.wav") for name in self.names}
+        missing = [os.path.basename(p) for p in paths.values() if not os.path.exists(p)]
+        if missing:
+            print(f"Warning: Not all sound files found in '{self.sounds_dir}'. Missing: {missing}")
+            return False
+
+        try:
+            pygame.mixer.init()
+            pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), len(self.names)))
+            pygame.mixer.set_reserved(len(self.names))
+            for index, (name, path) in enumerate(paths.items()):
+                self._sounds[name] = pygame.mixer.Sound(path)
+                self._channels[name] = pygame.mixer.Channel(index)
+        except Exception as e:
+            print(f"Sound init error: {e}")
+            self._sounds.clear()
+            self._channels.clear()
+            return False
+
+        self._mixer = pygame.mixer
+        self.enabled = True
+        return True
+
+    def play(self, name):
+        if not self.enabled:
+            return
+        sound = self._sounds.get(name)
+        if sound is None:
+            print(f"Warning: Unknown sound '{name}'")
+            return
+        try:
+            self._channels[name].play(sound)
+        except Exception as e:
+            print(f"Error playing sound '{name}': {e}")
+
+    def stop(self):
+        if not self.enabled:
+            return
+        try:
+            self._mixer.stop()
+        except Exception as e:
+            print(f"Pygame mixer stop error (ignored): {e}")
+
+    def close(self):
+        if self.enabled:
+            self._mixer.quit()
+            self.enabled = False
@@ -0,0 +1,52 @@
+from tkinter import ttk
+
+# Radio button variants used by the setup dialog: name -> font.
+RADIO_VARIANTS = {
+    "Large": ('Arial', 17, 'bold'),
+    "small": ('Arial', 15, 'bold'),
+}
+
+
+class StyleRegistry:
+    """Compiles each theme into named ttk styles once.
+
+    The 'clam' base theme is selected a single time; a colour theme's styles are
+    configured the first time they are asked for, and afterwards switching themes
+    is only a matter of using a different style name.
+    """
+
+    def __init__(self, root, themes):
+        self.themes = themes
+        self.style = ttk.Style(root)
+        self.style.theme_use('clam')
+        self._compiled = set()
+
+    def configure_menubuttons(self, font, relief, padding):
+        self.style.configure('TMenubutton', font=font, relief=relief, padding=padding)
+
+    def radio_style(self, theme_name, variant):
+        """Style name for a setup-dialog radio button in the given theme."""
+        if theme_name not in self._compiled:
+            self._compile(theme_name)
+        return f"{self._prefix(theme_name)}.{variant}.TRadiobutton"
+
+    @staticmethod
+    def _prefix(theme_name):
+        # ttk style names are dot-separated, so keep theme names to plain words.
+        return "".join(ch for ch in theme_name if ch.isalnum())
+
+    def _compile(self, theme_name):
+        theme = self.themes[theme_name]
+        prefix = self._prefix(theme_name)
+        for variant, font in RADIO_VARIANTS.items():
+            name = f"{prefix}.{variant}.TRadiobutton"
+            self.style.configure(name,
+                                 background=theme["bg"],
+                                 foreground=theme["text"],
+                                 font=font,
+                                 selectcolor='blue',
+                                 indicatorsize=14)
+            self.style.map(name,
+                           background=[('selected', theme["bg"]),
+                                       ('active', theme.get("hover", theme["bg"]))])
+        self._compiled.add(theme_name)
@@ -0,0 +1,85 @@
+from functools import lru_cache
+
+SYMMETRY_COUNT = 8
+
+
+@lru_cache(maxsize=None)
+def symmetry_permutations(size):
+    """Cell permutations for the 8 rotations/reflections of a size x size board.
+
+    perms[k][i] is the index that cell i lands on under symmetry k; k == 0 is the identity.
+    """
+    last = size - 1
+    transforms = (
+        lambda r, c: (r, c),
+        lambda r, c: (c, last - r),
+        lambda r, c: (last - r, last - c),
+        lambda r, c: (last - c, r),
+        lambda r, c: (r, last - c),
+        lambda r, c: (last - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (last - c, last - r),
+    )
+    perms = []
+    for transform in transforms:
+        perm = []
+        for i in range(size * size):
+            r, c = transform(*divmod(i, size))
+            perm.append(r * size + c)
+        perms.append(tuple(perm))
+    return tuple(perms)
+
+
+@lru_cache(maxsize=None)
+def inverse_permutations(size):
+    inverses = []
+    for perm in symmetry_permutations(size):
+        inverse = [0] * len(perm)
+        for i, j in enumerate(perm):
+            inverse[j] = i
+        inverses.append(tuple(inverse))
+    return tuple(inverses)
+
+
+def transform_bits(bits, perm):
+    out = 0
+    while bits:
+        low = bits & -bits
+        out |= 1 << perm[low.bit_length() - 1]
+        bits ^= low
+    return out
+
+
+# For 3x3 every transform of a 9-bit side is a single table lookup.
+SYMMETRY_TABLES_3X3 = tuple(
+    tuple(transform_bits(bits, perm) for bits in range(512))
+    for perm in symmetry_permutations(3)
+)
+
+
+def canonical_key_3x3(first_bits, second_bits):
+    """Smallest (first << 9 | second) over all 8 symmetries of a 3x3 position."""
+    return min(t[first_bits] << 9 | t[second_bits] for t in SYMMETRY_TABLES_3X3)
+
+
+def canonical_form(first_bits, second_bits, size):
+    """Return (first, second, k): the canonical pair and the symmetry index that produced it."""
+    if size == 3:
+        best = None
+        for k, t in enumerate(SYMMETRY_TABLES_3X3):
+            candidate = (t[first_bits] << 9 | t[second_bits], k)
+            if best is None or candidate < best:
+                best = candidate
+        key, k = best
+        return key >> 9, key & 511, k
+
+    shift = size * size
+    best = None
+    for k, perm in enumerate(symmetry_permutations(size)):
+        a = transform_bits(first_bits, perm)
+        b = transform_bits(second_bits, perm)
+        candidate = (a << shift | b, k)
+        if best is None or candidate < best:
+            best = candidate
+    key, k = best
+    return key >> shift, key & ((1 << shift) - 1), k
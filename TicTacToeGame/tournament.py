@@ -0,0 +1,195 @@
+"""Headless engine-vs-engine tournaments.
+
+    python tournament.py Hard Medium --games 1000 --workers 8 --out results.jsonl
+
+Games run across a process pool. Each game seeds its own RNG from --seed and its
+index, so any single 3x3 game can be replayed exactly (larger boards search under a
+wall-clock budget, so their moves can vary with machine load). Engines alternate who moves
+first. Results stream to JSONL as games finish, and a summary reports the first
+engine's win/draw/loss rates (95% Wilson intervals) and throughput.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import game_logic as gl
+import game_record
+from search_stats import LatencyHistogram, SearchStats
+
+Z_95 = 1.959964
+
+
+def play_game(task):
+    """Play one game; `task` is (index, seed, engine_a, engine_b, size, time_budget_ms, with_stats)."""
+    index, seed, engine_a, engine_b, size, time_budget_ms, with_stats = task
+    random.seed(seed)
+
+    # Even games: A plays X and moves first. Odd games: B does.
+    a_first = index % 2 == 0
+    players = [(engine_a, gl.PLAYER_X), (engine_b, gl.AI_O)] if a_first else \
+              [(engine_b, gl.PLAYER_X), (engine_a, gl.AI_O)]
+    a_symbol = gl.PLAYER_X if a_first else gl.AI_O
+
+    board = gl.init_board(size)
+    tracker = gl.incremental_board(size)
+    moves = []
+    move_stats = []
+    started = time.perf_counter()
+    turn = 0
+    while tracker.winner is None and not tracker.is_full():
+        engine, symbol = players[turn % 2]
+        stats = SearchStats() if with_stats else None
+        row, col = gl.ai_move(board, engine, symbol, board_size=size, time_budget_ms=time_budget_ms,
+                              stats=stats)
+        if stats is not None:
+            move_stats.append(stats.as_dict())
+        board[row][col] = symbol
+        tracker.play(row * size + col, gl.SYMBOL_SIDES[symbol])
+        moves.append(row * size + col)
+        turn += 1
+
+    winner = tracker.winner
+    if winner is None:
+        result = "draw"
+    elif winner == gl.SYMBOL_SIDES[a_symbol]:
+        result = "win"
+    else:
+        result = "loss"
+    record = {
+        "game": index,
+        "seed": seed,
+        "size": size,
+        "x": players[0][0],
+        "o": players[1][0],
+        "a_symbol": a_symbol,
+        "result": result,
+        "moves": moves,
+        "seconds": time.perf_counter() - started,
+    }
+    if with_stats:
+        record["move_stats"] = move_stats
+    return record
+
+
+def wilson_interval(successes, n, z=Z_95):
+    if n == 0:
+        return 0.0, 0.0
+    p = successes / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def _add_latencies(latency, record):
+    engines = (record["x"], record["o"])
+    for ply, stats in enumerate(record["move_stats"]):
+        engine = engines[ply % 2]
+        if engine not in latency:
+            latency[engine] = LatencyHistogram()
+        latency[engine].record(stats["elapsed_ms"], stats["nodes"])
+
+
+def _record_result(record):
+    if record["result"] == "draw":
+        return game_record.RESULT_DRAW
+    a_won = record["result"] == "win"
+    a_is_x = record["a_symbol"] == gl.PLAYER_X
+    return game_record.RESULT_X_WINS if a_won == a_is_x else game_record.RESULT_O_WINS
+
+
+def game_seed(base_seed, index):
+    return (base_seed * 1_000_003 + index) & 0xFFFFFFFF
+
+
+def run_tournament(engine_a, engine_b, games, workers=None, size=gl.BOARD_SIZE,
+                   time_budget_ms=gl.DEFAULT_TIME_BUDGET_MS, seed=0, on_result=None, latency=None):
+    """Play `games` games and return a summary dict; `on_result` sees each game as it ends.
+
+    If `latency` is a dict, it is filled with a LatencyHistogram of move times per engine.
+    """
+    with_stats = latency is not None
+    tasks = [(i, game_seed(seed, i), engine_a, engine_b, size, time_budget_ms, with_stats)
+             for i in range(games)]
+    counts = {"win": 0, "draw": 0, "loss": 0}
+    total_moves = 0
+    started = time.perf_counter()
+
+    workers = workers or os.cpu_count() or 1
+    # A few chunks per worker keeps them all busy without per-game IPC overhead.
+    chunksize = max(1, games // (workers * 8))
+    with multiprocessing.Pool(workers) as pool:
+        for record in pool.imap_unordered(play_game, tasks, chunksize=chunksize):
+            counts[record["result"]] += 1
+            total_moves += len(record["moves"])
+            if with_stats:
+                _add_latencies(latency, record)
+            if on_result is not None:
+                on_result(record)
+
+    elapsed = time.perf_counter() - started
+    summary = {"engine_a": engine_a, "engine_b": engine_b, "games": games, "size": size}
+    for outcome, count in counts.items():
+        low, high = wilson_interval(count, games)
+        summary[outcome] = {"count": count, "rate": count / games if games else 0.0,
+                            "ci95": [low, high]}
+    summary["seconds"] = elapsed
+    summary["games_per_sec"] = games / elapsed if elapsed else 0.0
+    summary["moves_per_sec"] = total_moves / elapsed if elapsed else 0.0
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless engine-vs-engine tournament")
+    parser.add_argument("engine_a", choices=gl.DIFFICULTIES)
+    parser.add_argument("engine_b", choices=gl.DIFFICULTIES)
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="default: one per CPU")
+    parser.add_argument("--size", type=int, default=gl.BOARD_SIZE, choices=gl.BOARD_SIZES)
+    parser.add_argument("--time-budget-ms", type=int, default=gl.DEFAULT_TIME_BUDGET_MS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="JSONL file to stream per-game results to")
+    parser.add_argument("--record", metavar="PATH", help="binary game log to append every game to")
+    parser.add_argument("--stats", action="store_true",
+                        help="collect per-move search stats and print latency histograms")
+    args = parser.parse_args(argv)
+    latency = {} if args.stats else None
+
+    out = open(args.out, "w") if args.out else None
+    log = game_record.GameRecordWriter(args.record, flush_each=False) if args.record else None
+    try:
+        def write(record):
+            if out is not None:
+                out.write(json.dumps(record) + "\n")
+            if log is not None:
+                log.append(record["size"], game_record.player_code(record["x"]),
+                           game_record.player_code(record["o"]), _record_result(record),
+                           record["moves"])
+
+        summary = run_tournament(args.engine_a, args.engine_b, args.games, args.workers,
+                                 args.size, args.time_budget_ms, args.seed, write, latency)
+    finally:
+        if out is not None:
+            out.close()
+        if log is not None:
+            log.close()
+
+    print(f"{args.engine_a} vs {args.engine_b} on {args.size}x{args.size}, {args.games} games")
+    for outcome in ("win", "draw", "loss"):
+        stats = summary[outcome]
+        low, high = stats["ci95"]
+        print(f"  {outcome:>4}: {stats['rate']:6.1%}  (95% CI {low:.1%} - {high:.1%})")
+    print(f"  {summary['games_per_sec']:.1f} games/sec, {summary['moves_per_sec']:.1f} moves/sec"
+          f" over {summary['seconds']:.2f} s")
+    for engine, histogram in sorted((latency or {}).items()):
+        print(f"{engine} move latency: {histogram.format()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
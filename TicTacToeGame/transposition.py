@@ -0,0 +1,41 @@
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+class TranspositionTable:
+    """Fixed-size score cache for alpha-beta search over a small integer score range.
+
+    Positions map to slot indices chosen by the caller. Each slot holds 0 (empty)
+    or a packed score and bound flag (exact, or only a lower/upper bound), which
+    is a small int, so probing and storing never allocate. Unpack a probed entry
+    with `scores[entry]` and `flags[entry]`.
+    """
+
+    def __init__(self, slots, min_score, max_score):
+        self.min_score = min_score
+        self._slots = [0] * slots
+        self._empty = [0] * slots
+        packed = range((max_score - min_score + 1) * 3)
+        self.scores = (None,) + tuple(min_score + i // 3 for i in packed)
+        self.flags = (None,) + tuple(i % 3 for i in packed)
+
+    def __len__(self):
+        return len(self._slots) - self._slots.count(0)
+
+    def probe(self, index):
+        return self._slots[index]
+
+    def store(self, index, score, flag):
+        self._slots[index] = (score - self.min_score) * 3 + flag + 1
+
+    def clear(self):
+        self._slots[:] = self._empty
+
+
+def bound_flag(score, alpha_orig, beta):
+    if score <= alpha_orig:
+        return UPPER_BOUND
+    if score >= beta:
+        return LOWER_BOUND
+    return EXACT
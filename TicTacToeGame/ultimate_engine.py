@@ -0,0 +1,401 @@
+"""Ultimate tic-tac-toe: nine 3x3 sub-boards inside one big 3x3 board.
+
+A move in cell `pos` of a sub-board sends the opponent to the sub-board at
+`pos`; if that one is already won or full, they may play in any open one.
+Winning a sub-board claims that square of the big board, and three claimed
+squares in a line win the game. When every sub-board is closed without that,
+the game is drawn.
+
+Each side keeps one 9-bit int per sub-board, laid out like the classic board
+(bit r * 3 + c), so wins and line potentials are table lookups. Cells of the
+whole 9x9 grid are numbered row * 9 + col, as on the other boards. The engine
+runs iterative-deepening alpha-beta (negamax) under a time budget, with a
+heuristic score kept up to date incrementally as moves are made and undone.
+
+    python ultimate_engine.py --time-budget-ms 1000    # nodes/sec from the opening
+"""
+import argparse
+import math
+import sys
+import time
+from functools import lru_cache
+
+from nk_engine import SearchTimeout
+
+GRID_SIZE = 9
+CELL_COUNT = GRID_SIZE * GRID_SIZE
+SUB_FULL = 0x1FF
+ANY_BOARD = -1
+WIN_SCORE = 1_000_000
+
+_LINE_MASKS = (0x007, 0x038, 0x1C0, 0x049, 0x092, 0x124, 0x111, 0x054)
+_WINS = tuple(any(bits & m == m for m in _LINE_MASKS) for bits in range(SUB_FULL + 1))
+# Centre, corners, edges.
+_CELL_PRIORITY = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+# Value of a line nobody has blocked, by how many of its cells one side holds.
+_LOCAL_LINE_WEIGHTS = (0, 1, 6, 0)
+_MACRO_LINE_WEIGHTS = (0, 40, 200, 0)
+_SUB_WIN_BONUS = 30
+_DEADLINE_CHECK_INTERVAL = 1024
+
+# Grid cell <-> (sub-board, position inside it).
+_CELL_SUB = tuple((cell // 27) * 3 + cell % 9 // 3 for cell in range(CELL_COUNT))
+_CELL_POS = tuple((cell // 9 % 3) * 3 + cell % 3 for cell in range(CELL_COUNT))
+_SUB_POS_CELL = tuple(
+    tuple((sub // 3 * 3 + pos // 3) * GRID_SIZE + sub % 3 * 3 + pos % 3 for pos in range(9))
+    for sub in range(9)
+)
+
+
+def _popcount(bits):
+    return bin(bits).count("1")
+
+
+def _ternary(bits):
+    return sum(3 ** i for i in range(9) if bits >> i & 1)
+
+
+@lru_cache(maxsize=None)
+def _tables():
+    """(ternary index, local score, macro potential, free cells) lookup tables.
+
+    A 3x3 pair (a, b) with no shared cells is indexed ternary[a] + 2 * ternary[b].
+    local[i] scores a sub-board for side a against side b; macro[i] is side a's
+    potential on the big board with b's squares (and drawn ones) blocked. Built
+    on first use so importing the engine stays cheap.
+    """
+    ternary = tuple(_ternary(bits) for bits in range(SUB_FULL + 1))
+    size = 3 ** 9
+    local = [0] * size
+    macro = [0] * size
+    for mine in range(SUB_FULL + 1):
+        rest = SUB_FULL ^ mine
+        blocked = rest
+        while True:
+            index = ternary[mine] + 2 * ternary[blocked]
+            local_score = macro_score = 0
+            for m in _LINE_MASKS:
+                if not blocked & m:
+                    local_score += _LOCAL_LINE_WEIGHTS[_popcount(mine & m)]
+                    macro_score += _MACRO_LINE_WEIGHTS[_popcount(mine & m)]
+                elif not mine & m:
+                    local_score -= _LOCAL_LINE_WEIGHTS[_popcount(blocked & m)]
+            local[index] = local_score
+            macro[index] = macro_score + _SUB_WIN_BONUS * _popcount(mine)
+            if not blocked:
+                break
+            blocked = (blocked - 1) & rest
+    free_cells = tuple(
+        tuple(tuple(_SUB_POS_CELL[sub][pos] for pos in _CELL_PRIORITY if free >> pos & 1)
+              for free in range(SUB_FULL + 1))
+        for sub in range(9)
+    )
+    return ternary, tuple(local), tuple(macro), free_cells
+
+
+class UltimateBoard:
+    """Ultimate position with play/undo, in the same shape as board_state.IncrementalBoard.
+
+    Sides are 0 and 1; play(cell, side) does not check legality (see is_legal).
+    `score` is a heuristic value for side 0, kept up to date by play and undo.
+    """
+    size = GRID_SIZE
+
+    def __init__(self):
+        self._ternary, self._local, self._macro, self._free_cells = _tables()
+        self.cells = [None] * CELL_COUNT
+        self.boards = ([0] * 9, [0] * 9)
+        self.won = [0, 0]
+        self.closed = 0
+        self.forced = ANY_BOARD
+        self.score = 0
+        self.macro_score = 0
+        self.move_count = 0
+        self.winner = None
+        self._win_at = None
+        self._moves = [0] * CELL_COUNT
+        self._undo_info = [None] * CELL_COUNT
+
+    def copy(self):
+        other = UltimateBoard.__new__(UltimateBoard)
+        other._ternary, other._local, other._macro, other._free_cells = \
+            self._ternary, self._local, self._macro, self._free_cells
+        other.cells = self.cells[:]
+        other.boards = (self.boards[0][:], self.boards[1][:])
+        other.won = self.won[:]
+        for name in ("closed", "forced", "score", "macro_score", "move_count", "winner", "_win_at"):
+            setattr(other, name, getattr(self, name))
+        other._moves = self._moves[:]
+        other._undo_info = self._undo_info[:]
+        return other
+
+    @property
+    def moves(self):
+        """Cells played so far, in order."""
+        return tuple(self._moves[:self.move_count])
+
+    def is_full(self):
+        """True once no sub-board is open, so there is no legal move."""
+        return self.closed == SUB_FULL
+
+    def active_boards(self):
+        """Mask of the sub-boards the next move may be played in."""
+        if self.winner is not None:
+            return 0
+        if self.forced != ANY_BOARD:
+            return 1 << self.forced
+        return SUB_FULL ^ self.closed
+
+    def sub_board_winner(self, sub):
+        for side in (0, 1):
+            if self.won[side] >> sub & 1:
+                return side
+        return None
+
+    def legal_moves(self):
+        """Legal cells for the next move, centre / corner / edge cells first in each sub-board."""
+        if self.winner is not None:
+            return []
+        x_boards, o_boards = self.boards
+        free_cells = self._free_cells
+        sub = self.forced
+        if sub != ANY_BOARD:
+            return list(free_cells[sub][SUB_FULL ^ (x_boards[sub] | o_boards[sub])])
+        moves = []
+        closed = self.closed
+        for sub in _CELL_PRIORITY:
+            if not closed >> sub & 1:
+                moves.extend(free_cells[sub][SUB_FULL ^ (x_boards[sub] | o_boards[sub])])
+        return moves
+
+    def is_legal(self, cell):
+        sub = _CELL_SUB[cell]
+        return self.cells[cell] is None and bool(self.active_boards() >> sub & 1)
+
+    def winning_line(self):
+        """(row, col) cells of the winning sub-board lines, or None.
+
+        Each sub-board on the first completed big-board line contributes the
+        cells of its own first completed line.
+        """
+        if self.winner is None:
+            return None
+        won = self.won[self.winner]
+        bits = self.boards[self.winner]
+        macro_line = next(m for m in _LINE_MASKS if won & m == m)
+        cells = []
+        for sub in range(9):
+            if macro_line >> sub & 1:
+                local_line = next(m for m in _LINE_MASKS if bits[sub] & m == m)
+                cells.extend(divmod(_SUB_POS_CELL[sub][pos], GRID_SIZE)
+                             for pos in range(9) if local_line >> pos & 1)
+        return cells
+
+    def play(self, cell, side):
+        """Place a stone for `side`; returns True if it wins the game."""
+        sub = _CELL_SUB[cell]
+        pos = _CELL_POS[cell]
+        boards = self.boards
+        mine = boards[side][sub] | (1 << pos)
+        theirs = boards[1 - side][sub]
+        ternary = self._ternary
+        index = ternary[mine] + 2 * ternary[theirs] if side == 0 else \
+            ternary[theirs] + 2 * ternary[mine]
+
+        n = self.move_count
+        self._moves[n] = cell
+        self._undo_info[n] = (self.forced, self.closed, self.score, self.macro_score, self.won[side])
+        self.move_count = n + 1
+        self.cells[cell] = side
+        # Score for side 0: drop this sub-board's old local term, then add the new state.
+        old_index = index - (ternary[1 << pos] if side == 0 else 2 * ternary[1 << pos])
+        score = self.score - self._local[old_index]
+        won = False
+
+        boards[side][sub] = mine
+        if _WINS[mine] or mine | theirs == SUB_FULL:
+            bit = 1 << sub
+            closed = self.closed | bit
+            self.closed = closed
+            if _WINS[mine]:
+                self.won[side] |= bit
+            x_won, o_won = self.won
+            drawn = closed ^ (x_won | o_won)
+            macro = self._macro
+            macro_score = macro[ternary[x_won] + 2 * ternary[o_won | drawn]] - \
+                macro[ternary[o_won] + 2 * ternary[x_won | drawn]]
+            score += macro_score - self.macro_score
+            self.macro_score = macro_score
+            if _WINS[self.won[side]]:
+                won = True
+                if self.winner is None:
+                    self.winner = side
+                    self._win_at = self.move_count
+        else:
+            score += self._local[index]
+        self.score = score
+        self.forced = ANY_BOARD if self.closed >> pos & 1 else pos
+        return won
+
+    def undo(self):
+        n = self.move_count - 1
+        cell = self._moves[n]
+        side = self.cells[cell]
+        if self._win_at == self.move_count:
+            self.winner = None
+            self._win_at = None
+        self.forced, self.closed, self.score, self.macro_score, self.won[side] = self._undo_info[n]
+        self.boards[side][_CELL_SUB[cell]] ^= 1 << _CELL_POS[cell]
+        self.cells[cell] = None
+        self.move_count = n
+        return cell
+
+
+class _Search:
+    def __init__(self, board, deadline, cancel_event=None):
+        self.board = board
+        self.deadline = deadline
+        self.cancel_event = cancel_event
+        self.nodes = 0
+        self.cutoffs = 0
+        self.max_ply = 0
+        self.killers = [None] * (CELL_COUNT + 1)
+
+    def out_of_time(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            return True
+        return time.perf_counter() >= self.deadline
+
+    def negamax(self, side, depth, ply, alpha, beta):
+        self.nodes += 1
+        if ply > self.max_ply:
+            self.max_ply = ply
+        if self.nodes % _DEADLINE_CHECK_INTERVAL == 0 and self.out_of_time():
+            raise SearchTimeout
+
+        board = self.board
+        if depth == 0:
+            return board.score if side == 0 else -board.score
+        moves = board.legal_moves()
+        if not moves:
+            return 0
+        killer = self.killers[ply]
+        if killer is not None and killer in moves:
+            moves.remove(killer)
+            moves.insert(0, killer)
+
+        best = -math.inf
+        first = True
+        for cell in moves:
+            if board.play(cell, side):
+                score = WIN_SCORE - ply
+            elif first:
+                score = -self.negamax(1 - side, depth - 1, ply + 1, -beta, -alpha)
+            else:
+                # Principal-variation search: a null window first, full width only if it fails.
+                score = -self.negamax(1 - side, depth - 1, ply + 1, -alpha - 1, -alpha)
+                if alpha < score < beta:
+                    score = -self.negamax(1 - side, depth - 1, ply + 1, -beta, -alpha)
+            board.undo()
+            first = False
+            if score > best:
+                best = score
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta:
+                        self.cutoffs += 1
+                        self.killers[ply] = cell
+                        break
+        return best
+
+    def root(self, side, depth, moves):
+        """Search the root to `depth`; returns (best cell, score)."""
+        board = self.board
+        best_score = -math.inf
+        best_move = moves[0]
+        alpha = -math.inf
+        for index, cell in enumerate(moves):
+            if board.play(cell, side):
+                board.undo()
+                return cell, WIN_SCORE
+            # A SearchTimeout leaves moves on the board; the caller discards it then.
+            if index == 0:
+                score = -self.negamax(1 - side, depth - 1, 1, -math.inf, -alpha)
+            else:
+                score = -self.negamax(1 - side, depth - 1, 1, -alpha - 1, -alpha)
+                if score > alpha:
+                    score = -self.negamax(1 - side, depth - 1, 1, -math.inf, -alpha)
+            board.undo()
+            if score > best_score:
+                best_score = score
+                best_move = cell
+            if best_score > alpha:
+                alpha = best_score
+        return best_move, best_score
+
+
+def best_move(board, side, time_budget_ms, max_depth=None, stats=None, cancel_event=None):
+    """Best cell for `side` to play on an UltimateBoard, found within `time_budget_ms`.
+
+    Deepens one ply at a time and returns the move of the deepest completed
+    iteration; `cancel_event` ends the search the same way as the deadline.
+    Returns None if there is no legal move. Counts go into `stats` as in
+    nk_engine.best_move. The board is searched on a copy, so it is left as is.
+    """
+    deadline = time.perf_counter() + time_budget_ms / 1000.0
+    moves = board.legal_moves()
+    if not moves:
+        return None
+    remaining = CELL_COUNT - board.move_count
+    search = _Search(board.copy(), deadline, cancel_event)
+    best = moves[0]
+    completed_depth = 0
+    depth_limit = remaining if max_depth is None else min(max_depth, remaining)
+
+    for depth in range(1, depth_limit + 1):
+        try:
+            move, score = search.root(side, depth, moves)
+        except SearchTimeout:
+            break
+        best = move
+        completed_depth = depth
+        # Search the previous best first next time round; it sharpens the cutoffs.
+        moves.remove(move)
+        moves.insert(0, move)
+        if abs(score) >= WIN_SCORE - CELL_COUNT:
+            break
+        if search.out_of_time():
+            break
+
+    if stats is not None:
+        stats.nodes += search.nodes
+        stats.cutoffs += search.cutoffs
+        stats.depth = max(stats.depth, completed_depth)
+        stats.max_ply = max(stats.max_ply, search.max_ply)
+    return best
+
+
+def main(argv=None):
+    from search_stats import SearchStats
+
+    parser = argparse.ArgumentParser(description="Ultimate tic-tac-toe search-rate check")
+    parser.add_argument("--time-budget-ms", type=int, default=1000)
+    parser.add_argument("--moves", type=int, default=0,
+                        help="play this many engine moves first, then time the next search")
+    args = parser.parse_args(argv)
+
+    board = UltimateBoard()
+    for ply in range(args.moves):
+        board.play(best_move(board, ply % 2, 100), ply % 2)
+    stats = SearchStats()
+    started = time.perf_counter()
+    move = best_move(board, args.moves % 2, args.time_budget_ms, stats=stats)
+    elapsed = time.perf_counter() - started
+    print(f"Ultimate, after {args.moves} moves: move {divmod(move, GRID_SIZE)}")
+    print(f"  {stats.nodes} nodes in {elapsed:.2f} s = {stats.nodes / elapsed:,.0f} nodes/sec,"
+          f" depth {stats.depth}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""Exhaustive check that the 3x3 Hard AI never loses.
+
+Plays every human move sequence against every move the AI could choose, with
+both sides moving first. The AI's random choices (its opening square and the
+pick among equally good moves) are expanded rather than sampled: ai_move runs
+under a stand-in for the `random` module that replays each possible sequence
+of choices in turn. Positions are deduplicated by symmetry and the game tree is
+split into shards after the AI's first move, one per pool task.
+
+    python verify_hard.py                    # exit code 1 on a losing line
+    python verify_hard.py --difficulty Medium --workers 1
+
+Any line the human wins is printed move by move. Deduplication assumes the
+engine treats symmetric positions alike; a reported line is always a real game.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+import game_logic as gl
+from symmetry import canonical_form
+
+
+class ChoiceEnumerator:
+    """Stands in for the `random` module so every sequence of random choices can be replayed.
+
+    Each call draws the next index from `script` (0 once the script runs out) and
+    records how many options it had; advance() steps the script to the next
+    unexplored sequence, like an odometer.
+    """
+
+    def __init__(self):
+        self.script = []
+        self.widths = []
+
+    def _pick(self, count):
+        position = len(self.widths)
+        self.widths.append(count)
+        return self.script[position] if position < len(self.script) else 0
+
+    def choice(self, seq):
+        return seq[self._pick(len(seq))]
+
+    def shuffle(self, seq):
+        for i in range(len(seq) - 1, 0, -1):
+            j = self._pick(i + 1)
+            seq[i], seq[j] = seq[j], seq[i]
+
+    def random(self):
+        # Only ever compared against 0.5 (Medium's coin flip): one value either side.
+        return (0.25, 0.75)[self._pick(2)]
+
+    def advance(self):
+        """Move to the next choice sequence; False once all have been replayed."""
+        script = self.script + [0] * (len(self.widths) - len(self.script))
+        del script[len(self.widths):]
+        while script:
+            script[-1] += 1
+            if script[-1] < self.widths[len(script) - 1]:
+                break
+            script.pop()
+        self.script = script
+        self.widths = []
+        return bool(script)
+
+
+_chooser = ChoiceEnumerator()
+
+
+def _install_chooser():
+    # Pool initializer: game_logic draws from _chooser instead of `random` in this process.
+    gl.random = _chooser
+
+
+def ai_replies(ai_bits, human_bits, difficulty, ai_symbol):
+    """Every cell ai_move can return here, over all of its random choices."""
+    human_symbol = gl.AI_O if ai_symbol == gl.PLAYER_X else gl.PLAYER_X
+    board = gl.init_board()
+    for bits, symbol in ((ai_bits, ai_symbol), (human_bits, human_symbol)):
+        for i in gl._MASK_TO_INDICES[bits]:
+            board[i // 3][i % 3] = symbol
+    _chooser.script = []
+    _chooser.widths = []
+    cells = set()
+    while True:
+        row, col = gl.ai_move(board, difficulty, ai_symbol)
+        cells.add(row * 3 + col)
+        if not _chooser.advance():
+            return cells
+
+
+def _ai_symbol(ai_first):
+    return gl.PLAYER_X if ai_first else gl.AI_O
+
+
+def _position(moves, ai_first):
+    """(ai_bits, human_bits) after a sequence of cells played from the empty board."""
+    sides = [0, 0]
+    for ply, cell in enumerate(moves):
+        sides[ply % 2] |= 1 << cell
+    return (sides[0], sides[1]) if ai_first else (sides[1], sides[0])
+
+
+def shards(difficulty, ai_first):
+    """Move sequences reaching each distinct human-to-move position after the AI's first move."""
+    if ai_first:
+        starts = [[]]
+    else:
+        starts = []
+        seen = set()
+        for cell in range(gl.CELL_COUNT):
+            key = canonical_form(0, 1 << cell, gl.BOARD_SIZE)[:2]
+            if key not in seen:
+                seen.add(key)
+                starts.append([cell])
+    result = []
+    seen = set()
+    for moves in starts:
+        ai_bits, human_bits = _position(moves, ai_first)
+        for cell in sorted(ai_replies(ai_bits, human_bits, difficulty, _ai_symbol(ai_first))):
+            key = canonical_form(ai_bits | 1 << cell, human_bits, gl.BOARD_SIZE)[:2]
+            if key not in seen:
+                seen.add(key)
+                result.append(moves + [cell])
+    return result
+
+
+def verify_shard(task):
+    """Search one shard; returns (positions, AI replies checked, losing line or None)."""
+    difficulty, ai_first, moves = task
+    ai_symbol = _ai_symbol(ai_first)
+    seen = set()
+    counts = [0, 0]
+
+    def explore(ai_bits, human_bits):
+        # Human to move; returns True once `moves` holds a line the human wins.
+        key = canonical_form(ai_bits, human_bits, gl.BOARD_SIZE)[:2]
+        if key in seen:
+            return False
+        seen.add(key)
+        counts[0] += 1
+        for cell in gl._MASK_TO_INDICES[gl.FULL_MASK ^ (ai_bits | human_bits)]:
+            human = human_bits | 1 << cell
+            moves.append(cell)
+            if gl._WIN_TABLE[human]:
+                return True
+            if ai_bits | human != gl.FULL_MASK:
+                for reply in sorted(ai_replies(ai_bits, human, difficulty, ai_symbol)):
+                    counts[1] += 1
+                    ai = ai_bits | 1 << reply
+                    moves.append(reply)
+                    if not gl._WIN_TABLE[ai] and ai | human != gl.FULL_MASK and explore(ai, human):
+                        return True
+                    moves.pop()
+            moves.pop()
+        return False
+
+    ai_bits, human_bits = _position(moves, ai_first)
+    lost = not gl._WIN_TABLE[ai_bits] and explore(ai_bits, human_bits)
+    return counts[0], counts[1], list(moves) if lost else None
+
+
+def verify(difficulty=gl.HARD, workers=None):
+    """Check both move orders; returns (positions, AI replies checked, losing line or None).
+
+    A losing line is (ai_first, cells in play order).
+    """
+    tasks = []
+    with multiprocessing.Pool(1, initializer=_install_chooser) as pool:
+        for ai_first in (True, False):
+            tasks += [(difficulty, ai_first, moves)
+                      for moves in pool.apply(shards, (difficulty, ai_first))]
+    positions = replies = 0
+    with multiprocessing.Pool(workers or os.cpu_count() or 1, initializer=_install_chooser) as pool:
+        for (_, ai_first, _), (found, checked, line) in zip(tasks, pool.imap(verify_shard, tasks)):
+            positions += found
+            replies += checked
+            if line is not None:
+                pool.terminate()
+                return positions, replies, (ai_first, line)
+    return positions, replies, None
+
+
+def _print_line(ai_first, line):
+    board = gl.init_board()
+    for ply, cell in enumerate(line):
+        human = (ply % 2 == 0) != ai_first
+        symbol = gl.PLAYER_X if ply % 2 == 0 else gl.AI_O
+        board[cell // 3][cell % 3] = symbol
+        print(f"  {ply + 1}. {'Human' if human else 'AI'} {symbol} at {gl.INDEX_TO_MOVE[cell]}")
+    print("\n".join("   " + " | ".join(row) for row in board))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exhaustively check that an AI level never loses on 3x3")
+    parser.add_argument("--difficulty", choices=gl.DIFFICULTIES[:3], default=gl.HARD)
+    parser.add_argument("--workers", type=int, default=None, help="default: one per CPU")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    positions, replies, lost = verify(args.difficulty, args.workers)
+    elapsed = time.perf_counter() - started
+    print(f"{args.difficulty}: {positions} positions, {replies} AI replies checked in {elapsed:.2f} s")
+    if lost is not None:
+        ai_first, line = lost
+        print(f"Counterexample ({'AI' if ai_first else 'human'} moves first, human wins):")
+        _print_line(ai_first, line)
+        return 1
+    print("No losing line: the AI never loses.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())